@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+import logging
+import os
+import queue
+import threading
+import time
+
+import numpy as np
+
+__all__ = ["CapturePipeline"]
+
+logger = logging.getLogger(__name__)
+
+# Records waiting for decoding/writing; bounds the memory held by the pipeline
+DEFAULT_QUEUE_SIZE = 4
+# Interval between :TER? polls while waiting for a trigger without SRQ, in seconds
+DEFAULT_POLL_INTERVAL = 0.001
+
+class CapturePipeline(object):
+    """
+    Continuous triggered capture with a DSOX3000.
+
+    The acquisition thread (the caller of run()) arms the scope, waits for the
+    trigger, downloads the raw record of all channels and re-arms the scope
+    right away. Decoding and writing happen on a worker thread, so the scope
+    waits for the next trigger while the previous record is being decoded
+    and written.
+
+    The scope has a single acquisition memory: re-arming overwrites it, so the
+    download of a record must be finished before the scope is re-armed. Only
+    decoding and disk I/O overlap with the next acquisition.
+
+    Records are handed to the worker through a queue of queue_size records.
+    If the worker falls behind, new records are dropped (drop=True, counted
+    in dropped_records) or the acquisition waits for free space (drop=False),
+    so memory never grows beyond queue_size records. Triggers the scope
+    misses while a record is downloaded are not counted.
+
+    Every record is written to <directory>/capture_NNNNNN.npz with the
+    decoded values of each channel (key = source) and their time base
+    (<source>_xorigin, <source>_xinc).
+    """
+    def __init__(self, scope, channels, directory, fmt="BYTE", mode="NORMAL", npoints=1000,
+                 dtype=np.float32, queue_size=DEFAULT_QUEUE_SIZE, drop=True,
+                 poll_interval=DEFAULT_POLL_INTERVAL, use_srq=True, trigger_timeout=None):
+        """
+        scope: DSOX3000 instance
+        channels: channel numbers or source names
+        use_srq: arm with :DIGITIZE and wait for the completion service request
+            (see DSOX3000.arm()). If False, arm with :SINGLE and poll :TER?
+            every poll_interval seconds.
+        trigger_timeout: seconds to wait for one trigger (None waits forever)
+        """
+        self.scope = scope
+        self.channels = channels
+        self.directory = directory
+        self.fmt = fmt
+        self.mode = mode
+        self.npoints = npoints
+        self.dtype = dtype
+        self.drop = drop
+        self.poll_interval = poll_interval
+        self.use_srq = use_srq
+        self.trigger_timeout = trigger_timeout
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+        self.captures = 0         # records downloaded
+        self.dropped_records = 0  # downloaded records dropped because the queue was full
+        self.written = 0          # records written to disk
+        self.elapsed = 0.0
+
+    def _arm(self):
+        if self.use_srq:
+            self.scope.arm(self.channels)
+        else:
+            self.scope.single()
+
+    def _wait_trigger(self, stop):
+        if self.use_srq:
+            return self.scope.wait_acquisition(self.trigger_timeout, stop)
+        deadline = None if self.trigger_timeout is None else time.monotonic() + self.trigger_timeout
+        while not self.scope.trigger_occured():
+            if stop is not None and stop():
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError("No trigger within {} s".format(self.trigger_timeout))
+            time.sleep(self.poll_interval)
+        return True
+
+    def _disarm(self):
+        # Leave no :DIGITIZE/*OPC pending for the next session. Best effort:
+        # a failed cleanup must not turn a stopped run into a failed one.
+        try:
+            self.scope.abort()
+        except Exception:
+            logger.warning("Could not abort the pending acquisition", exc_info=True)
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue  # keep draining so the acquisition never blocks
+            index, timestamp, record = item
+            try:
+                arrays = {"timestamp": np.float64(timestamp)}
+                for source, channel in record.items():
+                    arrays[source] = channel.record.values()
+                    arrays[source + "_xorigin"] = np.float64(channel.preamble.xorigin)
+                    arrays[source + "_xinc"] = np.float64(channel.preamble.xinc)
+                np.savez(os.path.join(self.directory, "capture_{:06d}.npz".format(index)), **arrays)
+                self.written += 1
+            except Exception as ex:
+                self._error = ex
+
+    def run(self, count=None, duration=None, stop=None):
+        """
+        Capture until count records were downloaded, duration seconds passed
+        or stop() returns True. Waits for all queued records to be written.
+        An acquisition still pending at the end is aborted (DSOX3000.abort()).
+        Returns the number of downloaded records.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        worker = threading.Thread(target=self._worker, name="capture-writer", daemon=True)
+        worker.start()
+        start = time.perf_counter()
+
+        def finished():
+            return ((count is not None and self.captures >= count)
+                    or (duration is not None and time.perf_counter() - start >= duration)
+                    or (stop is not None and stop())
+                    or self._error is not None)
+
+        armed = False
+        try:
+            self.scope.configure_channels(self.fmt, self.mode, self.npoints)
+            armed = True
+            self._arm()
+            while not finished():
+                if not self._wait_trigger(finished):
+                    break
+                armed = False
+                timestamp = time.time()
+                # Download first: re-arming overwrites the acquisition memory
+                record = self.scope.fetch_channels(self.channels, dtype=self.dtype)
+                self.captures += 1
+                if not finished():
+                    armed = True
+                    self._arm()
+                item = (self.captures, timestamp, record)
+                if self.drop:
+                    try:
+                        self._queue.put_nowait(item)
+                    except queue.Full:
+                        self.dropped_records += 1
+                else:
+                    self._queue.put(item)
+        finally:
+            self.elapsed = time.perf_counter() - start
+            if armed:
+                self._disarm()
+            self._queue.put(None)
+            worker.join()
+        if self._error is not None:
+            raise self._error
+        return self.captures
+
+    @property
+    def captures_per_second(self):
+        return self.captures / self.elapsed if self.elapsed else 0.0
+
+    def summary(self):
+        return "{} captures in {:.2f} s ({:.1f}/s), {} written, {} records dropped (queue full)".format(
+            self.captures, self.elapsed, self.captures_per_second, self.written, self.dropped_records)
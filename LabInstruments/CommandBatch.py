@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+try:
+    from .Sync import opc_confirmed
+except ImportError:  # imported from a script in the LabInstruments directory
+    from Sync import opc_confirmed
+
+__all__ = ["BatchedResource"]
+
+# Conservative limit for one program message, in characters
+DEFAULT_MAX_MESSAGE_LENGTH = 256
+
+class BatchedResource(object):
+    """
+    Proxy for a PyVISA resource that coalesces writes.
+
+    write() only queues the command. Queued commands are joined with ';'
+    into as few program messages as fit into max_message_length and sent
+    on flush() or together with the next query(), so a whole setup
+    sequence costs one or a few bus transactions.
+    All other attribute reads and writes (timeout, ...) and methods are
+    forwarded to the wrapped resource.
+    """
+    # Attributes of the proxy itself, everything else belongs to the resource
+    _OWN_ATTRIBUTES = ("inst", "max_message_length", "queue")
+
+    def __init__(self, inst, max_message_length=DEFAULT_MAX_MESSAGE_LENGTH):
+        self.inst = inst
+        self.max_message_length = max_message_length
+        self.queue = []
+
+    def __getattr__(self, name):
+        return getattr(self.inst, name)
+
+    def __setattr__(self, name, value):
+        if name in self._OWN_ATTRIBUTES:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.inst, name, value)
+
+    @staticmethod
+    def _normalize(command):
+        # Inside a compound message a command without leading ':' would be
+        # relative to the previous command's path, so make it absolute
+        command = command.strip()
+        if not command.startswith((":", "*")):
+            command = ":" + command
+        return command
+
+    def _messages(self, commands):
+        """Split commands into ';'-joined messages not longer than max_message_length"""
+        messages = []
+        current = []
+        length = 0
+        for command in commands:
+            if current and length + 1 + len(command) > self.max_message_length:
+                messages.append(";".join(current))
+                current = []
+                length = 0
+            length += len(command) + (1 if current else 0)
+            current.append(command)
+        if current:
+            messages.append(";".join(current))
+        return messages
+
+    def write(self, command):
+        self.queue.append(self._normalize(command))
+
+    def query(self, command, *args, **kwargs):
+        """Send the queued commands and the query, the query in the last message"""
+        commands, self.queue = self.queue, []
+        messages = self._messages(commands + [self._normalize(command)])
+        for message in messages[:-1]:
+            self.inst.write(message)
+        return self.inst.query(messages[-1], *args, **kwargs)
+
+    def flush(self, wait=True):
+        """
+        Send all queued commands.
+        If wait is True, *OPC? is appended to the last message so the call
+        returns once the instrument has executed everything; ValueError is
+        raised if the instrument does not confirm.
+        """
+        if wait:
+            response = self.query("*OPC?")
+            if not opc_confirmed(response):
+                raise ValueError("*OPC? after the batched commands returned {!r}".format(response))
+            return True
+        commands, self.queue = self.queue, []
+        for message in self._messages(commands):
+            self.inst.write(message)
+        return True
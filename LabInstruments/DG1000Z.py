@@ -1,7 +1,30 @@
 #!/usr/bin/env python3
+import hashlib
 from typing import Literal
+import numpy as np
 from UliEngineering.EngineerIO import normalize_numeric
-__all__ = ["DL3000"]
+__all__ = ["DG1000Z", "waveform_to_dac"]
+
+# 14 bit DAC: binary waveform points are 0 ... 16383
+DAC_MAX = 16383
+# Maximum number of points per :TRACE:DATA:DAC16 block
+DAC16_BLOCK_POINTS = 16384
+
+def waveform_to_dac(waveform):
+    """
+    Convert a waveform to DG1000Z DAC codes (uint16, 0 ... 16383).
+    Float waveforms are normalized values in -1.0 ... 1.0 as for
+    :DATA VOLATILE (-1 -> 0, 1 -> 16383), integer waveforms are taken
+    as DAC codes.
+    """
+    waveform = np.asarray(waveform)
+    if waveform.dtype.kind in "iu":
+        if waveform.size and (waveform.min() < 0 or waveform.max() > DAC_MAX):
+            raise ValueError(f"DAC codes must be in 0 ... {DAC_MAX}")
+        return waveform.astype("<u2")
+    if waveform.size and (waveform.min() < -1.0 or waveform.max() > 1.0):
+        raise ValueError("Normalized waveform values must be in -1.0 ... 1.0")
+    return np.rint((waveform + 1.0) * (DAC_MAX / 2.0)).astype("<u2")
 
 class DG1000Z(object):
     """
@@ -25,6 +48,8 @@ class DG1000Z(object):
         dg1022 = DG1000(inst)
         """
         self.inst = inst
+        # Channel -> SHA-1 of the DAC data last uploaded to its volatile memory
+        self._loaded_waveforms = {}
         
     @staticmethod
     def _float_or_string(s):
@@ -53,6 +78,8 @@ class DG1000Z(object):
         the waveform including the parameters.
         """
         self.inst.write(f"SOURCE{channel}:APPLY:{waveform}")
+        # The channel no longer outputs the uploaded waveform
+        self._loaded_waveforms.pop(channel, None)
         
     def query_waveform(self, channel=1):
         """
@@ -113,6 +140,7 @@ class DG1000Z(object):
         Set the given channel to DC mode with the given voltage.
         """
         self.inst.write(f":SOURCE{channel}:APPLY:DC DEF,DEF,{voltage}")
+        self._loaded_waveforms.pop(channel, None)
         
     def set_volatile_waveform(self, channel, waveform: list[float]):
         """
@@ -120,6 +148,46 @@ class DG1000Z(object):
         """
         waveform_str = ",".join([str(v) for v in waveform])
         self.inst.write(f":SOURCE{channel}:DATA VOLATILE,{waveform_str}")
+        self._loaded_waveforms.pop(channel, None)
+
+    def upload_volatile_waveform(self, channel, waveform, force=False):
+        """
+        Upload a waveform to the given channel's volatile memory as binary DAC data.
+
+        waveform: NumPy array or list, normalized floats (-1.0 ... 1.0) or
+        integer DAC codes (0 ... 16383), see waveform_to_dac().
+        The data is sent as little-endian IEEE binary blocks of at most
+        16384 points (:TRACE:DATA:DAC16 VOLATILE,CON|END,...).
+
+        The SHA-1 of the DAC data is remembered per channel, so uploading
+        the same waveform again is skipped unless force is True.
+        Returns True if data was sent, False if the waveform was already loaded.
+        """
+        dac = waveform_to_dac(waveform)
+        if dac.size == 0:
+            raise ValueError("Empty waveform")
+        digest = hashlib.sha1(dac.tobytes()).hexdigest()
+        if not force and self._loaded_waveforms.get(channel) == digest:
+            return False
+        # The cache is only valid after a complete upload
+        self._loaded_waveforms.pop(channel, None)
+        for start in range(0, dac.size, DAC16_BLOCK_POINTS):
+            block = dac[start:start + DAC16_BLOCK_POINTS]
+            flag = "END" if start + DAC16_BLOCK_POINTS >= dac.size else "CON"
+            self.inst.write_binary_values(f":SOURCE{channel}:TRACE:DATA:DAC16 VOLATILE,{flag},",
+                                          block, datatype="H", is_big_endian=False)
+        self._loaded_waveforms[channel] = digest
+        return True
+
+    def invalidate_waveform_cache(self, channel=None):
+        """
+        Forget which waveform is loaded (on one or all channels), e.g. after
+        the waveform was changed on the front panel or the instrument was reset.
+        """
+        if channel is None:
+            self._loaded_waveforms.clear()
+        else:
+            self._loaded_waveforms.pop(channel, None)
         
     def set_channel_arbitrary(self, channel, samplerate="100MSa/s", high_voltage=5.0, low_voltage=0.0):
         """
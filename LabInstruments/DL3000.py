@@ -1,8 +1,34 @@
 #!/usr/bin/env python3
 
-__all__ = ["DL3000"]
+__all__ = ["DL3000", "DL3000Sample"]
 
+import logging
 import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    from .CommandBatch import BatchedResource
+    from .Sync import wait_opc, wait_condition
+except ImportError:  # imported from a script in the LabInstruments directory
+    from CommandBatch import BatchedResource
+    from Sync import wait_opc, wait_condition
+
+logger = logging.getLogger(__name__)
+
+# Resolution of the V_Stop setting on the front panel, V
+VSTOP_RESOLUTION = 0.001
+
+# Field name -> measurement query, in the order of DL3000Sample
+MEASUREMENTS = {
+    "voltage": ":MEAS:VOLT?",
+    "current": ":MEAS:CURR?",
+    "power": ":MEAS:POW?",
+    "resistance": ":MEAS:RES?",
+    "capacity": ":MEAS:CAP?",
+    "watthours": ":MEAS:WATT?",
+    "discharging_time": ":MEAS:DISCHARGINGTIME?",
+}
 
 
 class DL3000(object):
@@ -15,6 +41,8 @@ class DL3000(object):
         This class does NOT open the resource, you have to open it for yourself!
         """
         self.inst = inst
+        # Set to False once the instrument failed to answer a compound query
+        self._compound_queries = True
 
     def voltage(self):
         # My DL3021 returns a string like '0.000067\n0'
@@ -40,6 +68,50 @@ class DL3000(object):
     def discharging_time(self):
         return self.inst.query(":MEAS:DISCHARGINGTIME?").partition("\n")[0]
 
+    def measure(self, fields=tuple(MEASUREMENTS)):
+        """
+        Read the given measurements (see MEASUREMENTS for valid names)
+        in a single compound SCPI query.
+        Returns a DL3000Sample, fields that were not requested are None.
+        The timestamp is the midpoint of the bus transaction (time.time()).
+
+        If the compound query times out or does not return every value,
+        the instrument is cleared (device clear) and the values are read
+        one by one (and this is remembered).
+        """
+        queries = [MEASUREMENTS[field] for field in fields]
+        start = time.time()
+        values = None
+        if self._compound_queries:
+            try:
+                # My DL3021 terminates every value like '0.000067\n0'
+                values = [v.partition("\n")[0] for v in self.inst.query(";".join(queries)).strip().split(";")]
+            except Exception as ex:
+                # Timeout or garbled reply: the firmware does not support compound queries
+                logger.warning("Compound query failed (%s), reading values one by one", ex)
+                values = None
+            if values is None or len(values) != len(queries):
+                # Discard a partial reply left in the output buffer
+                self.inst.clear()
+                self._compound_queries = False
+                values = None
+                start = time.time()
+        if values is None:
+            values = [self.inst.query(q).partition("\n")[0] for q in queries]
+        timestamp = (start + time.time()) / 2
+        parsed = {
+            field: value if field == "discharging_time" else float(value)
+            for field, value in zip(fields, values)
+        }
+        return DL3000Sample(timestamp=timestamp, **parsed)
+
+    def measure_all(self):
+        """
+        Read all measurements in a single bus round trip.
+        Returns a DL3000Sample.
+        """
+        return self.measure()
+
     def set_cc_slew_rate(self, slew):
         # My DL3021 returns a string like '0.000067\n0'
         self.inst.write(f":SOURCE:CURRENT:SLEW {slew}")
@@ -58,6 +130,21 @@ class DL3000(object):
         """
         self.inst.write(":SOURCE:INPUT:STAT ON")
 
+    def wait_current(self, level, tolerance=0.05, timeout=5.0):
+        """
+        Wait until the load has applied all commands (*OPC?) and the measured
+        current is within tolerance (relative) of level, instead of sleeping
+        for a fixed time after enable().
+        Raises TimeoutError if the current does not settle within timeout seconds.
+        Returns the measured current.
+        """
+        wait_opc(self.inst, timeout)
+        response = wait_condition(
+            self.inst, ":MEAS:CURR?",
+            lambda r: abs(float(r.partition("\n")[0]) - level) <= abs(level) * tolerance,
+            timeout=timeout)
+        return float(response.partition("\n")[0])
+
     def disable(self):
         """
         Disable the electronic load
@@ -77,51 +164,84 @@ class DL3000(object):
         """
         self.inst.write(":SOURCE:FUNCTION:MODE {}".format(mode))
     
-    import time
+    @contextmanager
+    def batch(self, wait=True):
+        """
+        Coalesce all writes inside the with-block into as few bus messages as possible.
+        Queries inside the block are sent together with the queued writes.
+        On exit the remaining writes are sent with *OPC? appended (if wait is True),
+        so the block returns once the instrument has applied everything.
+        ValueError is raised if the instrument does not confirm *OPC?.
 
-    def set_battery_vstop(self, voltage):
+        Example:
+        ```
+        with inst.batch():
+            inst.reset()
+            inst.set_app_mode("BATTERY")
+            inst.set_cc_current(0.5)
+        ```
+        """
+        if isinstance(self.inst, BatchedResource):
+            # Nested batch: just keep queueing into the outer one
+            yield self
+            return
+        batched = BatchedResource(self.inst)
+        self.inst = batched
+        try:
+            yield self
+            batched.flush(wait=wait)
+        finally:
+            self.inst = batched.inst
+
+    def query_battery_vstop(self):
+        """
+        Get the stop voltage (V_Stop) of BATTERY mode
+        """
+        return float(self.inst.query(":SOURCE:BATTERY:VSTOP?").partition("\n")[0])
+
+    def set_battery_vstop(self, voltage, verify=False):
         """
         Sets the stop voltage (V_Stop) in BATTERY mode using virtual panel emulation
         
+        All key presses are sent as one batched message.
+        
         Args:
             voltage (float): Stop voltage value (e.g., 3.7)
+            verify (bool): Read V_Stop back afterwards and raise ValueError if it
+                differs by more than the display resolution. The read back is
+                best effort: if the firmware does not answer the query,
+                only a warning is logged.
         """
-        # Configure delays for different operations
-        base_delay=0
-        short_delay = base_delay * 0.5  # 0.1s for quick operations
-        medium_delay = base_delay       # 0.2s default
-        long_delay = base_delay * 2.5   # 0.5s for mode changes
-        
-        # Enable debug mode for virtual panel
-        self.inst.write(":DEBUG:KEY ON")
-        time.sleep(short_delay)
-        
-        # Switch to BATTERY mode if not already active
-        self.set_app_mode("BATTERY")
-        time.sleep(long_delay)
-        
-        # Press Third menu key (16) twice to access V_Stop
-        self.inst.write(":SYSTEM:KEY 16")
-        time.sleep(medium_delay)
-        self.inst.write(":SYSTEM:KEY 16")
-        time.sleep(long_delay)
-        
+        # Third menu key (16) twice to access V_Stop
+        keys = [16, 16]
         # Enter voltage value digit by digit
-        voltage_str = f"{voltage:.3f}"  # Format to 3 decimal places
-        for char in voltage_str:
+        for char in f"{voltage:.3f}":  # Format to 3 decimal places
             if char == '.':
-                self.inst.write(":SYSTEM:KEY 30")  # Decimal point
+                keys.append(30)  # Decimal point
             elif char.isdigit():
-                key_code = 20 + int(char)  # Numeric keys 0-9 (codes 20-29)
-                self.inst.write(f":SYSTEM:KEY {key_code}")
-            time.sleep(medium_delay)
-        
+                keys.append(20 + int(char))  # Numeric keys 0-9 (codes 20-29)
         # Confirm selection (OK key - 41)
-        self.inst.write(":SYSTEM:KEY 41")
-        time.sleep(medium_delay)
-        
-        # Disable debug mode
-        self.inst.write(":DEBug:KEY OFF")
+        keys.append(41)
+
+        with self.batch():
+            # Enable debug mode for virtual panel
+            self.inst.write(":DEBUG:KEY ON")
+            # Switch to BATTERY mode if not already active
+            self.set_app_mode("BATTERY")
+            for key in keys:
+                self.inst.write(f":SYSTEM:KEY {key}")
+            # Disable debug mode
+            self.inst.write(":DEBUG:KEY OFF")
+        if not verify:
+            return
+        try:
+            actual = self.query_battery_vstop()
+        except Exception as ex:
+            # VISA timeout or an unparsable reply: the firmware has no such query
+            logger.warning("Could not read back V_Stop, not verified: %s", ex)
+            return
+        if abs(actual - voltage) > VSTOP_RESOLUTION:
+            raise ValueError(f"V_Stop was set to {actual} V instead of {voltage} V")
 
     def set_cc_vlim(self, vlim=5):
         """
@@ -174,3 +294,5 @@ class DL3000(object):
 
     def reset(self):
         return self.inst.write("*RST")
+
+DL3000Sample = namedtuple("DL3000Sample", ["timestamp"] + list(MEASUREMENTS), defaults=(None,) * (len(MEASUREMENTS) + 1))
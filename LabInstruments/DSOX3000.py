@@ -1,9 +1,29 @@
 #!/usr/bin/env python3
+import os
 import numpy as np
 import struct
 from collections import namedtuple
 
-__all__ = ["DSOX3000", "decode_dsox3000_data"]
+try:
+    from .Sync import visa_timeout, start_with_opc, wait_srq
+except ImportError:  # imported from a script in the LabInstruments directory
+    from Sync import visa_timeout, start_with_opc, wait_srq
+
+__all__ = ["DSOX3000", "DSOX3000Channel", "DSOX3000Record", "decode_dsox3000_data", "decode_dsox3000_record",
+           "decode_dsox3000_blocks", "decode_dsox3000_to_file"]
+
+# :WAVEFORM:FORMAT -> preamble format code and raw sample dtype (unsigned, MSB first)
+WAVEFORM_FORMATS = {
+    "BYTE": (0, np.dtype("u1")),
+    "WORD": (1, np.dtype(">u2")),
+}
+# Preamble format code -> raw sample dtype
+FORMAT_DTYPES = {code: dtype for code, dtype in WAVEFORM_FORMATS.values()}
+
+# Bytes requested from the instrument per read during a streamed download
+DEFAULT_CHUNK_SIZE = 1 << 20
+# Points decoded per block
+DEFAULT_BLOCK_SIZE = 1 << 20
 
 class DSOX3000(object):
     """
@@ -142,24 +162,30 @@ class DSOX3000(object):
     def acquisition_type_normal(self):
         self.acquisition_type("HRES")
     
-    def screenshot_png(self):
+    def screenshot_png(self, timeout=10.0):
         """
-        Create a PNG screenshot
+        Create a PNG screenshot.
+        The read simply waits (up to timeout seconds) until the scope has
+        rendered the image instead of sleeping for a fixed delay first.
         """
-        return self.inst.query_binary_values(":DISP:DATA? PNG", datatype='s', delay=1)[0]
+        with visa_timeout(self.inst, timeout):
+            return self.inst.query_binary_values(":DISP:DATA? PNG", datatype='s')[0]
 
-    def waveform_configure(self, src, mode="RAW", npoints="8000000"):
+    def waveform_configure(self, src, mode="RAW", npoints="8000000", fmt="WORD"):
         """
         Acquire waveform data and store in memory so it
         src: "CHAN<n>" | "FUNC" | "MATH" | "SBUS1" | "SBUS2"
         mode: "NORMAL" | "MAXIMUM" | "RAW"
+        fmt: "WORD" (16 bit) | "BYTE" (8 bit, half the transfer size)
         """
-        self.inst.write(":WAVEFORM:FORMAT WORD") # binary WORD transfer
+        if fmt not in WAVEFORM_FORMATS:
+            raise ValueError("Unsupported waveform format {}".format(fmt))
+        self.inst.write(":WAVEFORM:FORMAT {}".format(fmt)) # binary transfer
         self.inst.write(":WAVEFORM:UNSIGNED ON") # unsigned data transfer
-        self.inst.write(":WAVEFORM:BYTEORDER MSBFirst") # Little endian
+        self.inst.write(":WAVEFORM:BYTEORDER MSBFirst") # Big endian
         self.inst.write(":WAVEFORM:SOURCE {}".format(src))
         self.inst.write(":WAVEFORM:POINTS:MODE {}".format(mode))
-        self.inst.write(":WAVEFORM:POINTS {}".format(npoints)) # binary WORD transfer
+        self.inst.write(":WAVEFORM:POINTS {}".format(npoints))
 
     def waveform_digitize(self, src):
         self.inst.write(":DIGITIZE {}".format(src))
@@ -167,32 +193,176 @@ class DSOX3000(object):
     def trigger_occured(self):
         return self.inst.query(":TER?").strip() == "+1"
 
+    def arm(self, channels):
+        """
+        Start a :DIGITIZE of the given channels without blocking.
+        The scope raises a service request when the acquisition is complete,
+        see wait_acquisition().
+        """
+        start_with_opc(self.inst, ":DIGITIZE {}".format(",".join(self._sources(channels))))
+
+    def wait_acquisition(self, timeout=10.0, stop=None):
+        """
+        Wait for the acquisition started by arm() (SRQ, or status byte polling
+        if the interface has no SRQ events).
+        Returns False if stop() became true, raises TimeoutError after timeout seconds.
+        """
+        return wait_srq(self.inst, timeout, stop) is not None
+
+    def abort(self):
+        """
+        Cancel an acquisition started by arm() or single() and clear the status,
+        so no stale OPC bit or service request is left for the next session.
+
+        :DIGITIZE blocks the command parser until the acquisition is complete,
+        so commands sent after it would wait for a trigger. The pending
+        command is cancelled with a device clear instead.
+        """
+        self.inst.clear()
+        self.inst.write(":STOP;*CLS")
+
+    def waveform_preamble(self):
+        """
+        Query and parse the waveform preamble
+        """
+        return parse_dsox3000_preamble(self.inst.query(":WAVEFORM:PREAMBLE?"))
+
     def waveform_data(self):
         """
         Retrieve acquired waveform data
         Call waveform_acquire() before this!!
         """
-        preamble = self.inst.query(":WAVEFORM:PREAMBLE?")
-        fmt, typ, pnts, count, xinc, xorigin, xreference, yincrement, yorigin, yreference = preamble.strip().split(",")
-        # Parse preamble
-        pnts = int(pnts)
-        count = int(count)
-        xinc = float(xinc)
-        xorigin = float(xorigin)
-        xreference = int(xreference)
-        yincrement = float(yincrement)
-        yorigin = float(yorigin)
-        yreference = int(yreference)
-
-        preamble = DSOX3000Preamble(pnts, count, xinc, xorigin, xreference, yincrement, yorigin, yreference)
+        preamble = self.waveform_preamble()
         # Request actual data
-        data = self.inst.query_binary_values(":WAVEFORM:DATA?", datatype='H', container=np.ndarray, is_big_endian=True)
+        data = self.inst.query_binary_values(":WAVEFORM:DATA?", datatype=preamble.datatype,
+                                             container=np.ndarray, is_big_endian=True)
+        return preamble, data
+
+    def _read_block_header(self):
+        """
+        Read the IEEE 488.2 definite length block header '#<n><n digits>'.
+        Returns the number of data bytes that follow.
+        """
+        start = self.inst.read_bytes(2)
+        if start[:1] != b"#" or not start[1:2].isdigit() or start[1:2] == b"0":
+            raise ValueError("Expected a definite length binary block, got {!r}".format(start))
+        return int(self.inst.read_bytes(int(start[1:2])))
+
+    def _stream_block_to_file(self, command, filename, dtype, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Send command and copy the binary block it returns into a memory-mapped
+        file in chunks of chunk_size bytes. Returns a read-only np.memmap of dtype.
+        """
+        self.inst.write(command)
+        nbytes = self._read_block_header()
+        if nbytes % dtype.itemsize:
+            raise ValueError("Waveform block length {} is not a multiple of {}".format(nbytes, dtype.itemsize))
+        if nbytes == 0:
+            # np.memmap cannot map an empty file
+            open(filename, "wb").close()
+            self.inst.read_bytes(1)  # message terminator
+            return np.empty(0, dtype=dtype)
+        data = np.memmap(filename, dtype=dtype, mode="w+", shape=(nbytes // dtype.itemsize,))
+        raw = data.view(np.uint8)
+        offset = 0
+        while offset < nbytes:
+            chunk = self.inst.read_bytes(min(chunk_size, nbytes - offset))
+            raw[offset:offset + len(chunk)] = np.frombuffer(chunk, dtype=np.uint8)
+            offset += len(chunk)
+        self.inst.read_bytes(1)  # message terminator
+        data.flush()
+        del raw, data
+        return np.memmap(filename, dtype=dtype, mode="r")
+
+    def waveform_data_to_file(self, filename, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Retrieve acquired waveform data (see waveform_configure())
+        and stream it into a memory-mapped file instead of memory.
+
+        The block is read in chunks of chunk_size bytes and copied straight into
+        the file, so peak memory does not depend on the record length.
+        Returns (preamble, data) where data is a read-only np.memmap of
+        filename (raw unsigned samples, no header).
+        """
+        preamble = self.waveform_preamble()
+        data = self._stream_block_to_file(":WAVEFORM:DATA?", filename, preamble.dtype, chunk_size)
         return preamble, data
 
+    @staticmethod
+    def _sources(channels):
+        return [chan if isinstance(chan, str) else "CHAN{}".format(chan) for chan in channels]
+
+    def configure_channels(self, fmt="BYTE", mode="NORMAL", npoints=1000, digitize=None):
+        """
+        Set the waveform transfer format for all sources in one message.
+        fmt: "BYTE" (8 bit, half the transfer of "WORD") | "WORD"
+        mode, npoints: see waveform_configure()
+        digitize: optional list of channels to :DIGITIZE in the same message
+        """
+        if fmt not in WAVEFORM_FORMATS:
+            raise ValueError("Unsupported waveform format {}".format(fmt))
+        commands = [
+            ":WAVEFORM:FORMAT {}".format(fmt),
+            ":WAVEFORM:UNSIGNED ON",
+            ":WAVEFORM:BYTEORDER MSBFirst",
+            ":WAVEFORM:POINTS:MODE {}".format(mode),
+            ":WAVEFORM:POINTS {}".format(npoints),
+        ]
+        if digitize:
+            commands.append(":DIGITIZE {}".format(",".join(self._sources(digitize))))
+        self.inst.write(";".join(commands))
+
+    def fetch_channels(self, channels, dtype=np.float64, directory=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Download the last acquisition of several channels
+        (format as set by configure_channels()).
+
+        channels: channel numbers or source names, e.g. [1, 2] or ["CHAN1", "MATH"]
+        dtype: dtype of the values decoded on demand by the channel's DSOX3000Record
+        directory: if given, raw data is streamed into <directory>/<source>.bin
+            memory-mapped files instead of memory (see waveform_data_to_file())
+
+        Costs one message that returns all preambles and one data query per channel.
+        Returns a dict source -> DSOX3000Channel in the order of channels.
+        """
+        sources = self._sources(channels)
+        # All preambles in one round trip, they are separated by ';' in the response
+        response = self.inst.query(";".join(
+            ":WAVEFORM:SOURCE {};:WAVEFORM:PREAMBLE?".format(source) for source in sources))
+        preambles = [parse_dsox3000_preamble(text) for text in response.strip().split(";")]
+        if len(preambles) != len(sources):
+            raise ValueError("Expected {} preambles, got {!r}".format(len(sources), response))
+
+        result = {}
+        for source, preamble in zip(sources, preambles):
+            command = ":WAVEFORM:SOURCE {};:WAVEFORM:DATA?".format(source)
+            if directory is None:
+                data = self.inst.query_binary_values(command, datatype=preamble.datatype,
+                                                     container=np.ndarray, is_big_endian=True)
+            else:
+                data = self._stream_block_to_file(command, os.path.join(directory, source + ".bin"),
+                                                  preamble.dtype, chunk_size)
+            result[source] = DSOX3000Channel(source, preamble, data,
+                                             decode_dsox3000_record(preamble, data, dtype, source))
+        return result
+
+    def acquire_channels(self, channels, fmt="BYTE", mode="NORMAL", npoints=1000,
+                         dtype=np.float64, directory=None, chunk_size=DEFAULT_CHUNK_SIZE):
+        """
+        Digitize several channels at once and download all of them.
+        See configure_channels() and fetch_channels() for the arguments.
+
+        The whole sequence costs one configuration message with :DIGITIZE,
+        one message that returns all preambles and one data query per channel.
+        Returns a dict source -> DSOX3000Channel in the order of channels.
+        """
+        self.configure_channels(fmt, mode, npoints, digitize=channels)
+        return self.fetch_channels(channels, dtype, directory, chunk_size)
+
     def reset(self):
         self.inst.write("*RST")
 
-DSOX3000Preamble = namedtuple("DSOX3000Preamble", [
+class DSOX3000Preamble(namedtuple("DSOX3000Preamble", [
     "pnts",
     "count",
     "xinc",
@@ -201,13 +371,170 @@ DSOX3000Preamble = namedtuple("DSOX3000Preamble", [
     "yincrement",
     "yorigin",
     "yreference",
+    "format",  # 0 = BYTE, 1 = WORD
+], defaults=(1,))):
+    __slots__ = ()
+
+    @property
+    def dtype(self):
+        """NumPy dtype of the raw samples"""
+        return FORMAT_DTYPES[self.format]
+
+    @property
+    def datatype(self):
+        """struct datatype of the raw samples for query_binary_values()"""
+        return self.dtype.char
+
+DSOX3000Channel = namedtuple("DSOX3000Channel", [
+    "source",    # e.g. "CHAN1"
+    "preamble",  # DSOX3000Preamble
+    "data",      # raw unsigned samples (np.ndarray or np.memmap)
+    "record",    # DSOX3000Record, decodes values and times on demand
 ])
 
-def decode_dsox3000_data(preamble, data):
+def parse_dsox3000_preamble(text):
+    """
+    Parse a :WAVEFORM:PREAMBLE? response into a DSOX3000Preamble
+    """
+    fmt, typ, pnts, count, xinc, xorigin, xreference, yincrement, yorigin, yreference = text.strip().split(",")
+    return DSOX3000Preamble(int(pnts), int(count), float(xinc), float(xorigin), int(xreference),
+                            float(yincrement), float(yorigin), int(yreference), int(fmt))
+
+def decode_dsox3000_blocks(preamble, data, dtype=np.float64, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Decode raw samples block by block.
+    Yields (start index, y block in dtype), so only one block is in memory at a time.
+    """
+    for start in range(0, len(data), block_size):
+        yield start, _decode(preamble, data[start:start + block_size], dtype)
+
+def _decode(preamble, raw, dtype):
+    y = np.asarray(raw).astype(dtype)
+    y *= np.asarray(preamble.yincrement, dtype=dtype)
+    y += np.asarray(preamble.yorigin - preamble.yreference * preamble.yincrement, dtype=dtype)
+    return y
+
+def decode_dsox3000_data(preamble, data, dtype=np.float64, out=None, block_size=DEFAULT_BLOCK_SIZE):
     """
     Postprocess binary data from a DSOX3000 series scope
     Generates NumPy (x, y) data where x in seconds and Y is in the channel unit (usually volts)
+
+    y is decoded in blocks into out (or a new array of dtype), e.g. np.float32
+    halves the memory needed. x is always float64: float32 cannot resolve the
+    sample interval relative to the origin for long records.
+    """
+    y = np.empty(len(data), dtype=dtype) if out is None else out
+    for start, block in decode_dsox3000_blocks(preamble, data, y.dtype, block_size):
+        y[start:start + len(block)] = block
+    x = DSOX3000Record(preamble, data).times()
+    return x, y
+
+def decode_dsox3000_to_file(preamble, data, filename, dtype=np.float32, block_size=DEFAULT_BLOCK_SIZE):
+    """
+    Decode raw samples (e.g. from DSOX3000.waveform_data_to_file()) into a
+    memory-mapped file of dtype, block by block with bounded memory.
+    Returns the y values as np.memmap, x can be computed from the preamble.
+    """
+    if len(data) == 0:
+        open(filename, "wb").close()
+        return np.empty(0, dtype=dtype)
+    y = np.memmap(filename, dtype=dtype, mode="w+", shape=(len(data),))
+    for start, block in decode_dsox3000_blocks(preamble, data, y.dtype, block_size):
+        y[start:start + len(block)] = block
+    y.flush()
+    return y
+
+
+class DSOX3000Record(object):
+    """
+    Decoded scope record with an implicit time axis.
+
+    Only the raw samples and the preamble are kept. Times are computed from
+    xorigin, xinc and xreference and values are decoded only for the requested
+    slice, so no array of the record length is created unless asked for.
+    envelope() reduces any range to a fixed number of min/max bins for display
+    or export with memory proportional to the number of bins.
+    """
+    def __init__(self, preamble, data, dtype=np.float64, source=None):
+        self.preamble = preamble
+        self.data = data
+        self.dtype = np.dtype(dtype)
+        self.source = source
+
+    def __len__(self):
+        return len(self.data)
+
+    @property
+    def duration(self):
+        return len(self.data) * self.preamble.xinc
+
+    def time_at(self, index):
+        """Time in seconds of a sample index (scalar or array)"""
+        p = self.preamble
+        return (np.asarray(index, dtype=np.float64) - p.xreference) * p.xinc + p.xorigin
+
+    def index_at(self, time):
+        """Index of the sample nearest to time (scalar or array), clipped to the record"""
+        p = self.preamble
+        index = np.rint((np.asarray(time, dtype=np.float64) - p.xorigin) / p.xinc) + p.xreference
+        return np.clip(index, 0, max(len(self.data) - 1, 0)).astype(np.int64)
+
+    def times(self, index=slice(None)):
+        """Times in seconds of a slice of samples (float64)"""
+        start, stop, step = index.indices(len(self.data))
+        return self.time_at(np.arange(start, stop, step))
+
+    def values(self, index=slice(None)):
+        """Decoded values of a slice of samples"""
+        return _decode(self.preamble, self.data[index], self.dtype)
+
+    def between(self, start_time, stop_time):
+        """Slice of the samples from start_time up to and including stop_time"""
+        start, stop = self.index_at([start_time, stop_time])
+        return slice(int(start), int(stop) + 1)
+
+    def envelope(self, width, index=slice(None), block_size=DEFAULT_BLOCK_SIZE):
+        """
+        Min/max decimation of a slice of samples to at most width bins.
+
+        Returns (t, ymin, ymax): the time of the first sample of every bin and
+        the decoded minimum and maximum in it. Bins are reduced on the raw
+        samples in chunks of about block_size samples, only the 2 * width
+        extremes are decoded.
+        """
+        start, stop, step = index.indices(len(self.data))
+        if step != 1:
+            raise ValueError("envelope() needs a contiguous slice")
+        n = max(stop - start, 0)
+        if n == 0 or width <= 0:
+            empty = np.empty(0, dtype=self.dtype)
+            return np.empty(0), empty, empty
+        bin_size = -(-n // width)  # ceil
+        nbins = -(-n // bin_size)
+        raw_min = np.empty(nbins, dtype=self.data.dtype)
+        raw_max = np.empty(nbins, dtype=self.data.dtype)
+        bins_per_chunk = max(block_size // bin_size, 1)
+        full_bins = n // bin_size
+        for first in range(0, full_bins, bins_per_chunk):
+            count = min(bins_per_chunk, full_bins - first)
+            offset = start + first * bin_size
+            chunk = np.asarray(self.data[offset:offset + count * bin_size]).reshape(count, bin_size)
+            raw_min[first:first + count] = chunk.min(axis=1)
+            raw_max[first:first + count] = chunk.max(axis=1)
+        if full_bins < nbins:
+            tail = np.asarray(self.data[start + full_bins * bin_size:stop])
+            raw_min[-1] = tail.min()
+            raw_max[-1] = tail.max()
+        ymin = _decode(self.preamble, raw_min, self.dtype)
+        ymax = _decode(self.preamble, raw_max, self.dtype)
+        if self.preamble.yincrement < 0:
+            ymin, ymax = ymax, ymin
+        t = self.time_at(start + np.arange(nbins) * bin_size)
+        return t, ymin, ymax
+
+def decode_dsox3000_record(preamble, data, dtype=np.float64, source=None):
+    """
+    Wrap raw DSOX3000 samples (np.ndarray or np.memmap) in a DSOX3000Record.
+    Nothing is decoded until values or an envelope are requested.
     """
-    y = (data.astype(np.int32) - preamble.yreference) * preamble.yincrement + preamble.yorigin
-    x = np.arange(y.shape[0]) * preamble.xinc + preamble.xorigin
-    return x, y
\ No newline at end of file
+    return DSOX3000Record(preamble, data, dtype if dtype is not None else np.float64, source)
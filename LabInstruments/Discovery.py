@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+__all__ = ["probe_resource", "probe_resources", "ProbeResult"]
+
+# Resource classes that are probed by default: None probes every ?*::INSTR
+# resource, including GPIB and serial (ASRL). Pass e.g. ("USB", "TCPIP")
+# to skip serial ports where unrelated devices can block for the whole timeout.
+DEFAULT_RESOURCE_CLASSES = None
+
+ProbeResult = namedtuple("ProbeResult", [
+    "resource_str",
+    "idn",       # stripped *IDN? response or None
+    "resource",  # open PyVISA resource for matches, otherwise None
+    "latency",   # seconds spent on open + *IDN?
+    "error",     # exception or None
+])
+
+def filter_resources(resources, resource_classes=DEFAULT_RESOURCE_CLASSES):
+    """
+    Keep only resource strings of the given classes, e.g. ("USB", "TCPIP").
+    resource_classes=None keeps everything.
+    """
+    if resource_classes is None:
+        return list(resources)
+    prefixes = tuple(cls.upper() for cls in resource_classes)
+    return [r for r in resources if r.upper().startswith(prefixes)]
+
+def probe_resource(rm, resource_str, timeout=1000, match=None, keep_open=True):
+    """
+    Open a single resource with a short timeout (in ms) and send *IDN?.
+    If the IDN satisfies match(idn) (or match is None) and keep_open is True,
+    the resource is returned open with its original timeout restored,
+    otherwise it is closed.
+    """
+    start = time.perf_counter()
+    resource = None
+    try:
+        resource = rm.open_resource(resource_str, open_timeout=timeout)
+        original_timeout = resource.timeout
+        resource.timeout = timeout
+        idn = resource.query("*IDN?").strip()
+    except Exception as ex:
+        if resource is not None:
+            try:
+                resource.close()
+            except Exception:
+                pass
+        return ProbeResult(resource_str, None, None, time.perf_counter() - start, ex)
+
+    if keep_open and (match is None or match(idn)):
+        resource.timeout = original_timeout
+    else:
+        resource.close()
+        resource = None
+    return ProbeResult(resource_str, idn, resource, time.perf_counter() - start, None)
+
+def _close_late_result(future):
+    # Probes that finish after probe_resources() returned must not leak resources
+    if not future.cancelled() and future.exception() is None:
+        result = future.result()
+        if result.resource is not None:
+            result.resource.close()
+
+def probe_resources(rm, resources=None, match=None, limit=None, timeout=1000,
+                    resource_classes=DEFAULT_RESOURCE_CLASSES, max_workers=16, keep_open=True):
+    """
+    Probe resources concurrently with *IDN?.
+
+    rm: PyVISA ResourceManager
+    resources: resource strings to probe (default: rm.list_resources())
+    match: optional predicate on the IDN string. Matching resources are kept open.
+    limit: return as soon as this many matching resources were found.
+        Probes still running are left to finish in the background and closed.
+    timeout: per-resource open/query timeout in milliseconds
+
+    Returns a list of ProbeResult in order of completion.
+    Total time is about the slowest single probe instead of the sum of all probes.
+    """
+    if resources is None:
+        resources = rm.list_resources()
+    resources = filter_resources(resources, resource_classes)
+    if not resources:
+        return []
+
+    results = []
+    nmatches = 0
+    executor = ThreadPoolExecutor(max_workers=min(max_workers, len(resources)))
+    try:
+        pending = {
+            executor.submit(probe_resource, rm, resource_str, timeout, match, keep_open)
+            for resource_str in resources
+        }
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                results.append(result)
+                if result.idn is not None and (match is None or match(result.idn)):
+                    nmatches += 1
+            if limit is not None and nmatches >= limit:
+                for future in pending:
+                    future.add_done_callback(_close_late_result)
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+    return results
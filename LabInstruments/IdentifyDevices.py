@@ -1,20 +1,39 @@
 #!/usr/bin/env python3
+import argparse
+import logging
 import pyvisa
+try:
+    from LabInstruments.Inventory import InventoryCache, find_instruments
+except ImportError:  # run as a script from the LabInstruments directory
+    from Inventory import InventoryCache, find_instruments
+
+parser = argparse.ArgumentParser(description="Identify the connected PyVISA instruments")
+parser.add_argument("resource_classes", nargs="*",
+                    help="only probe these resource classes, e.g. USB TCPIP (default: all)")
+parser.add_argument("--refresh", action="store_true",
+                    help="ignore the inventory cache and probe every resource")
+args = parser.parse_args()
+
+logging.basicConfig(level=logging.INFO, format="%(message)s")
+
 rm = pyvisa.ResourceManager()
 
-resources = rm.list_resources()
+# Known instruments are opened directly, all resources are probed in parallel
+# only if the cache is empty, outdated or --refresh is given
+results = find_instruments(rm, cache=InventoryCache(), refresh=args.refresh,
+                           resource_classes=args.resource_classes or None, background=False,
+                           include_errors=True)
 
-if not resources:
+if not results:
     print("No PyVISA resources found")
 
-# Try to open resources and let them identify themselves
-for resource in resources:
-    print("\nTrying to open resource: ", resource)
-    try:
-        res = rm.open_resource(resource)
-        idn_parts = res.query("*IDN?").split(",")
-        identifier = " ".join(idn_parts[:2]) # MFR & Model
-        serial = idn_parts[2]
-        print("\tIt's a {} with serial {}".format(identifier, serial))
-    except Exception as ex:
-        print("\t Error: {}".format(ex))
+for result in results:
+    print("\nTrying to open resource: ", result.resource_str)
+    if result.error is not None:
+        print("\t Error: {} ({:.0f} ms)".format(result.error, result.latency * 1000))
+        continue
+    idn_parts = result.idn.split(",")
+    identifier = " ".join(idn_parts[:2]) # MFR & Model
+    serial = idn_parts[2] if len(idn_parts) > 2 else "?"
+    print("\tIt's a {} with serial {} ({:.0f} ms)".format(identifier, serial, result.latency * 1000))
+    result.resource.close()
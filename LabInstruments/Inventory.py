@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import threading
+import time
+
+try:
+    from .Discovery import probe_resources, filter_resources, DEFAULT_RESOURCE_CLASSES
+except ImportError:  # imported from a script in the LabInstruments directory
+    from Discovery import probe_resources, filter_resources, DEFAULT_RESOURCE_CLASSES
+
+__all__ = ["InventoryCache", "find_instruments"]
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".labinstruments_inventory.json")
+
+logger = logging.getLogger(__name__)
+
+class InventoryCache(object):
+    """
+    Local cache of known instruments, keyed by PyVISA resource string.
+    Every entry stores the *IDN? response, the serial number and
+    the time (time.time()) the instrument last answered.
+    """
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def matching(self, match=None):
+        """
+        Return the cached resource strings whose IDN satisfies match(idn),
+        most recently seen first
+        """
+        with self._lock:
+            items = [(r, e) for r, e in self.entries.items() if match is None or match(e["idn"])]
+        items.sort(key=lambda item: item[1]["last_seen"], reverse=True)
+        return [r for r, _ in items]
+
+    def update(self, resource_str, idn):
+        idn_parts = idn.split(",")
+        with self._lock:
+            self.entries[resource_str] = {
+                "idn": idn,
+                "serial": idn_parts[2].strip() if len(idn_parts) > 2 else None,
+                "last_seen": time.time(),
+            }
+
+    def remove(self, resource_str):
+        with self._lock:
+            self.entries.pop(resource_str, None)
+
+    def save(self):
+        """Atomically write the cache file"""
+        with self._lock:
+            data = json.dumps(self.entries, indent=1, sort_keys=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+def _rescan(rm, cache, match, timeout, resource_classes, exclude=()):
+    """Full enumeration + probe. Updates and saves the cache, returns the results"""
+    start = time.perf_counter()
+    resources = [r for r in rm.list_resources() if r not in exclude]
+    results = probe_resources(rm, resources, match=match, timeout=timeout,
+                              resource_classes=resource_classes, keep_open=True)
+    for result in results:
+        if result.error is None:
+            cache.update(result.resource_str, result.idn)
+        else:
+            cache.remove(result.resource_str)
+            logger.info("%s: no answer after %.0f ms (%s)", result.resource_str, result.latency * 1000, result.error)
+    cache.save()
+    logger.info("Inventory rescan: %d resources probed in %.0f ms",
+                len(results), (time.perf_counter() - start) * 1000)
+    return results
+
+def _background_rescan(rm, cache, match, timeout, resource_classes, exclude):
+    try:
+        for result in _rescan(rm, cache, match, timeout, resource_classes, exclude):
+            # Nobody is waiting for these resources, only the cache matters
+            if result.resource is not None:
+                result.resource.close()
+    except Exception:
+        logger.exception("Background inventory rescan failed")
+
+def find_instruments(rm, match=None, cache=None, refresh=False, timeout=1000,
+                     resource_classes=DEFAULT_RESOURCE_CLASSES, background=True, include_errors=False):
+    """
+    Find instruments whose IDN satisfies match(idn), using the inventory cache.
+
+    Cached resources are opened directly (no VISA enumeration) and checked with *IDN?.
+    A full rescan is done only if refresh is True, the cache has no matching entry
+    or no cached instrument answered. If some (but not all) cached instruments
+    fail to answer, the answering ones are returned immediately and the rescan
+    runs in a background thread (background=True) to update the cache for next time.
+    Cached entries are filtered by resource_classes like the rescan.
+
+    Returns a list of ProbeResult for the matching instruments (resources are open).
+    With include_errors=True the resources that failed to answer are returned
+    as well (with error set and resource None).
+    """
+    if cache is None:
+        cache = InventoryCache()
+
+    cached = [] if refresh else filter_resources(cache.matching(match), resource_classes)
+    hits = []
+    if cached:
+        results = probe_resources(rm, cached, match=match, timeout=timeout, resource_classes=None)
+        misses = []
+        for result in results:
+            if result.resource is not None:
+                hits.append(result)
+                cache.update(result.resource_str, result.idn)
+                logger.info("Inventory cache hit: %s (%.0f ms)", result.resource_str, result.latency * 1000)
+            else:
+                misses.append(result)
+                logger.info("Inventory cache miss: %s (%s)", result.resource_str, result.error or result.idn)
+        if not misses:
+            cache.save()
+            return hits
+        if hits and background:
+            exclude = {result.resource_str for result in hits}
+            threading.Thread(target=_background_rescan, name="inventory-rescan", daemon=True,
+                             args=(rm, cache, match, timeout, resource_classes, exclude)).start()
+            if include_errors:
+                hits.extend(result for result in misses if result.error is not None)
+            return hits
+    else:
+        logger.info("Inventory cache: %s, full rescan", "refresh requested" if refresh else "no matching entries")
+
+    exclude = {result.resource_str for result in hits}
+    for result in _rescan(rm, cache, match, timeout, resource_classes, exclude):
+        if result.resource is not None or (include_errors and result.error is not None):
+            hits.append(result)
+    return hits
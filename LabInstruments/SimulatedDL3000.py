@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+import threading
+import time
+
+__all__ = ["BatteryModel", "SimulatedDL3000Resource", "SimulatedResourceManager"]
+
+# Longest simulated integration step in seconds and the step count limit per update
+MAX_STEP = 1.0
+MAX_STEPS = 1000
+
+DEFAULT_IDN = "RIGOL TECHNOLOGIES,DL3021,DL3SIM{:07d},00.01.05.00.01"
+
+# Typical Li-ion open circuit voltage curve: (state of charge, volts)
+LI_ION_OCV = (
+    (0.00, 2.50), (0.02, 3.00), (0.05, 3.30), (0.10, 3.45), (0.20, 3.58),
+    (0.40, 3.70), (0.60, 3.82), (0.80, 3.98), (0.95, 4.12), (1.00, 4.20),
+)
+
+def _interpolate(table, x):
+    if x <= table[0][0]:
+        return table[0][1]
+    for (x0, y0), (x1, y1) in zip(table, table[1:]):
+        if x <= x1:
+            return y0 + (y1 - y0) * (x - x0) / (x1 - x0)
+    return table[-1][1]
+
+class BatteryModel(object):
+    """
+    Battery discharge model: open circuit voltage as a function of the state
+    of charge minus the drop on the internal resistance.
+
+    capacity: nominal capacity in mAh
+    internal_resistance: in ohms
+    speed: simulated seconds per wall clock second, so a long discharge
+        can be run in a few seconds
+    """
+    def __init__(self, capacity=200.0, internal_resistance=0.15, ocv=LI_ION_OCV, speed=1.0):
+        self.capacity = capacity
+        self.internal_resistance = internal_resistance
+        self.ocv = ocv
+        self.speed = speed
+        self.charge = 0.0  # delivered charge, mAh
+
+    @property
+    def state_of_charge(self):
+        return max(1.0 - self.charge / self.capacity, 0.0)
+
+    def open_circuit_voltage(self):
+        return _interpolate(self.ocv, self.state_of_charge)
+
+    def terminal_voltage(self, current):
+        return max(self.open_circuit_voltage() - current * self.internal_resistance, 0.0)
+
+    def discharge(self, current, seconds):
+        self.charge += current * seconds / 3.6
+
+class SimulatedDL3000Resource(object):
+    """
+    Stand-in for a PyVISA resource of a Rigol DL3021 for benchmarks and
+    development without hardware.
+
+    It answers the SCPI subset used by DL3000, including ';'-joined compound
+    messages and the virtual front panel key sequence of set_battery_vstop().
+    Every write() and query() sleeps for latency seconds (one bus round trip)
+    plus command_latency seconds per command in the message.
+    """
+    def __init__(self, model=None, idn=DEFAULT_IDN.format(1), latency=0.002, command_latency=0.0,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.model = model if model is not None else BatteryModel()
+        self.idn = idn
+        self.latency = latency
+        self.command_latency = command_latency
+        self.timeout = 2000
+        self.closed = False
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._replies = []
+        self.reset()
+
+    def reset(self):
+        self.enabled = False
+        self.function = "CURR"
+        self.app_mode = "FIX"
+        self.cc_current = 0.0
+        self.vstop = 0.0
+        self.debug_keys = False
+        self._keys = []
+        self._last_update = self._clock()
+        self._watthours = 0.0
+        self._discharging_time = 0.0
+        self._voltage = self.model.terminal_voltage(0.0)
+        self._current = 0.0
+
+    # -- simulation --
+
+    def _update(self):
+        """Advance the battery model to the current time"""
+        now = self._clock()
+        seconds = (now - self._last_update) * self.model.speed
+        self._last_update = now
+        if not self.enabled or seconds <= 0:
+            self._current = 0.0
+            self._voltage = self.model.terminal_voltage(0.0)
+            return
+        current = self.cc_current
+        # Integrate in short steps so the V_Stop cutoff is not overshot
+        step = max(MAX_STEP, seconds / MAX_STEPS)
+        while seconds > 0:
+            voltage = self.model.terminal_voltage(current)
+            if self.app_mode == "BATT" and voltage <= self.vstop:
+                # BATTERY mode stops the discharge by itself at V_Stop
+                self.enabled = False
+                current = 0.0
+                voltage = self.model.terminal_voltage(0.0)
+                break
+            dt = min(step, seconds)
+            self.model.discharge(current, dt)
+            self._watthours += voltage * current * dt / 3600
+            self._discharging_time += dt
+            seconds -= dt
+        self._current = current
+        self._voltage = voltage
+
+    def _press_key(self, key):
+        # 16 16 <digits> 41 enters V_Stop on the BATTERY screen
+        if key == 41:
+            digits = "".join("." if k == 30 else str(k - 20) for k in self._keys if 20 <= k <= 30)
+            if self.app_mode == "BATT" and self._keys[:2] == [16, 16] and digits:
+                self.vstop = float(digits)
+            self._keys = []
+        else:
+            self._keys.append(key)
+
+    def _measure(self, header):
+        if header.startswith(":MEAS:VOLT"):
+            return f"{self._voltage:.6f}"
+        if header.startswith(":MEAS:CURR"):
+            return f"{self._current:.6f}"
+        if header.startswith(":MEAS:POW"):
+            return f"{self._voltage * self._current:.6f}"
+        if header.startswith(":MEAS:RES"):
+            return f"{self._voltage / self._current:.6f}" if self._current else "9.999999E+06"
+        if header.startswith(":MEAS:CAP"):
+            return f"{self.model.charge:.6f}"
+        if header.startswith(":MEAS:WATT"):
+            return f"{self._watthours:.6f}"
+        if header.startswith(":MEAS:DISCHARGINGTIME"):
+            seconds = int(self._discharging_time)
+            return f"{seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}"
+        raise ValueError(f"Unsupported query {header}")
+
+    def _execute(self, command):
+        """Execute a single command, return the reply of a query or None"""
+        header, _, argument = command.strip().partition(" ")
+        header = header.upper()
+        argument = argument.strip().upper()
+        if not header.startswith("*") and not header.startswith(":"):
+            header = ":" + header
+        if header == "*IDN?":
+            return self.idn
+        if header == "*OPC?":
+            return "1"
+        if header == "*RST":
+            self.reset()
+            return None
+        if header == "*CLS":
+            return None
+        if header.startswith(":MEAS:"):
+            self._update()
+            return self._measure(header)
+        if header.startswith(":SOURCE:INPUT:STAT") or header.startswith(":SOUR:INP:STAT"):
+            if header.endswith("?"):
+                return "1" if self.enabled else "0"
+            self._update()
+            self.enabled = argument in ("ON", "1")
+            self._last_update = self._clock()
+            return None
+        if header.startswith(":SOURCE:FUNCTION:MODE"):
+            if header.endswith("?"):
+                return self.app_mode
+            self.app_mode = argument[:4]
+            return None
+        if header.startswith(":SOURCE:FUNCTION"):
+            if header.endswith("?"):
+                return self.function
+            self.function = argument[:4]
+            return None
+        if header.startswith(":SOURCE:CURRENT:LEV") or header.startswith(":SOURCE:CURR:LEV"):
+            self._update()
+            self.cc_current = float(argument)
+            return None
+        if header.startswith(":SOURCE:BATTERY:VSTOP"):
+            if header.endswith("?"):
+                return f"{self.vstop:.3f}"
+            self.vstop = float(argument)
+            return None
+        if header == ":DEBUG:KEY":
+            self.debug_keys = argument == "ON"
+            return None
+        if header == ":SYSTEM:KEY":
+            if self.debug_keys:
+                self._press_key(int(argument))
+            return None
+        if header.endswith("?"):
+            raise ValueError(f"Unsupported query {header}")
+        # Other settings (slew rate, limits, ...) are accepted and ignored
+        return None
+
+    def _transaction(self, message):
+        if self.closed:
+            raise ValueError("Resource is closed")
+        commands = [c for c in message.strip().split(";") if c.strip()]
+        self._sleep(self.latency + self.command_latency * len(commands))
+        with self._lock:
+            replies = [self._execute(command) for command in commands]
+        return [reply for reply in replies if reply is not None]
+
+    # -- PyVISA resource interface --
+
+    def write(self, message):
+        self._replies.extend(self._transaction(message))
+        return len(message)
+
+    def read(self):
+        if not self._replies:
+            raise TimeoutError("Simulated VISA timeout: nothing to read")
+        replies, self._replies = self._replies, []
+        return ";".join(replies) + "\n"
+
+    def query(self, message):
+        self.write(message)
+        return self.read()
+
+    def clear(self):
+        """Device clear: discard pending replies"""
+        self._replies = []
+
+    def close(self):
+        self.closed = True
+
+class SimulatedResourceManager(object):
+    """
+    Stand-in for pyvisa.ResourceManager with count simulated DL3021 loads.
+    Keyword arguments are passed to every SimulatedDL3000Resource;
+    model_factory() creates a fresh BatteryModel for each load.
+    """
+    def __init__(self, count=1, model_factory=BatteryModel, open_latency=0.01, **kwargs):
+        self.open_latency = open_latency
+        self.devices = {}
+        for n in range(1, count + 1):
+            idn = DEFAULT_IDN.format(n)
+            resource_str = "USB0::6833::3601::{}::0::INSTR".format(idn.split(",")[2])
+            self.devices[resource_str] = dict(kwargs, idn=idn, model_factory=model_factory)
+
+    def list_resources(self, query="?*::INSTR"):
+        return tuple(self.devices)
+
+    def open_resource(self, resource_str, open_timeout=None, **kwargs):
+        if resource_str not in self.devices:
+            raise ValueError(f"Unknown simulated resource {resource_str}")
+        time.sleep(self.open_latency)
+        options = dict(self.devices[resource_str])
+        model = options.pop("model_factory")()
+        return SimulatedDL3000Resource(model=model, **options)
+
+    def close(self):
+        pass
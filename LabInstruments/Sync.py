@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+import time
+from contextlib import contextmanager
+
+__all__ = ["visa_timeout", "opc_confirmed", "wait_opc", "enable_opc_srq", "start_with_opc", "wait_srq", "wait_condition"]
+
+# IEEE 488.2 status byte bits
+STB_ESB = 0x20  # event status summary
+STB_RQS = 0x40  # request service / master summary status
+# Standard event status register bit set by *OPC
+ESR_OPC = 0x01
+# PyVISA VI_ERROR_TMO
+VISA_TIMEOUT_ERROR_CODE = -1073807339
+
+# Longest single wait_for_srq() call, so stop() is checked regularly
+SRQ_WAIT_SLICE = 0.1
+# Polling interval bounds of the fallbacks, in seconds
+MIN_POLL_INTERVAL = 0.001
+MAX_POLL_INTERVAL = 0.05
+
+@contextmanager
+def visa_timeout(inst, timeout):
+    """
+    Temporarily set the VISA timeout of inst to timeout seconds
+    (None keeps the current timeout)
+    """
+    if timeout is None:
+        yield inst
+        return
+    original = inst.timeout
+    inst.timeout = int(timeout * 1000)
+    try:
+        yield inst
+    finally:
+        inst.timeout = original
+
+def opc_confirmed(response):
+    """True if response is a *OPC? reply confirming completion ('1' or '+1')"""
+    return response.strip().lstrip("+") == "1"
+
+def wait_opc(inst, timeout=10.0):
+    """
+    Block until the instrument has executed all previous commands (*OPC?).
+    The VISA timeout is raised to timeout seconds for this query only.
+    """
+    with visa_timeout(inst, timeout):
+        return opc_confirmed(inst.query("*OPC?"))
+
+def enable_opc_srq(inst):
+    """Clear the status and let *OPC raise a service request (ESE bit 0 -> ESB -> SRQ)"""
+    inst.write("*CLS;*ESE {};*SRE {}".format(ESR_OPC, STB_ESB))
+
+def start_with_opc(inst, command):
+    """
+    Send a long-running command followed by *OPC without waiting.
+    Completion can then be awaited with wait_srq() while the bus stays free.
+    """
+    enable_opc_srq(inst)
+    inst.write("{};*OPC".format(command))
+
+def _status_byte(inst):
+    # Serial poll does not go through the (possibly busy) command parser
+    try:
+        return inst.read_stb()
+    except (AttributeError, NotImplementedError):
+        return int(inst.query("*STB?").strip().lstrip("+"))
+
+def _poll(check, timeout, stop):
+    deadline = None if timeout is None else time.monotonic() + timeout
+    interval = MIN_POLL_INTERVAL
+    while True:
+        result = check()
+        if result is not None:
+            return result
+        if stop is not None and stop():
+            return None
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError("Instrument did not reach the expected state within {} s".format(timeout))
+        time.sleep(interval)
+        interval = min(interval * 2, MAX_POLL_INTERVAL)
+
+def wait_srq(inst, timeout=10.0, stop=None):
+    """
+    Wait for the service request set up by enable_opc_srq()/start_with_opc().
+
+    Uses the VISA SRQ event (wait_for_srq) where the interface supports it,
+    otherwise polls the status byte with a growing interval.
+    stop: optional function, checked regularly; returns None if it became true.
+    Raises TimeoutError after timeout seconds (None waits forever).
+    Returns the standard event status register, which is cleared by reading it.
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    native = hasattr(inst, "wait_for_srq")
+    while native:
+        remaining = SRQ_WAIT_SLICE if deadline is None else min(SRQ_WAIT_SLICE, deadline - time.monotonic())
+        if remaining <= 0:
+            raise TimeoutError("No service request within {} s".format(timeout))
+        try:
+            inst.wait_for_srq(int(remaining * 1000))
+            break
+        except (NotImplementedError, AttributeError):
+            native = False
+        except Exception as ex:
+            # VisaIOError: a timeout slice expired or the interface has no SRQ events
+            if getattr(ex, "error_code", None) != VISA_TIMEOUT_ERROR_CODE:
+                native = False
+            elif stop is not None and stop():
+                return None
+    if not native:
+        remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+        stb = _poll(lambda: True if _status_byte(inst) & (STB_RQS | STB_ESB) else None, remaining, stop)
+        if stb is None:
+            return None
+    return int(inst.query("*ESR?").strip().lstrip("+"))
+
+def wait_condition(inst, query, predicate, timeout=10.0, stop=None):
+    """
+    Poll query until predicate(response) is true, e.g. a status condition
+    register bit or a measured value reaching its setpoint.
+    The polling interval starts at 1 ms and grows up to 50 ms.
+    Returns the last response, None if stop() became true.
+    Raises TimeoutError after timeout seconds.
+    """
+    def check():
+        response = inst.query(query)
+        return response if predicate(response) else None
+    return _poll(check, timeout, stop)
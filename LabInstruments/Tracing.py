@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import struct
+import threading
+import time
+
+__all__ = ["Tracer", "TracedResource", "trace"]
+
+logger = logging.getLogger(__name__)
+
+# PyVISA VI_ERROR_TMO
+VISA_TIMEOUT_ERROR_CODE = -1073807339
+
+# Latency histogram buckets: bucket n holds latencies of [2**(n-1), 2**n) microseconds
+HISTOGRAM_BUCKETS = 32
+
+# Methods of a PyVISA message based resource that cause bus traffic
+TRACED_METHODS = ("write", "query", "read", "write_raw", "read_raw", "read_bytes",
+                  "write_ascii_values", "query_ascii_values",
+                  "write_binary_values", "query_binary_values")
+
+def command_key(message):
+    """
+    Key under which a message is counted: the headers of all commands
+    in the message without their arguments, e.g.
+    ':SOURCE:CURRENT:LEV:IMM 0.5' -> ':SOURCE:CURRENT:LEV:IMM'
+    """
+    if isinstance(message, (bytes, bytearray)):
+        message = message.decode("ascii", "replace")
+    return ";".join(command.strip().partition(" ")[0].upper() for command in message.strip().split(";"))
+
+# Position of the datatype argument of the *_binary_values methods and PyVISA's default
+BINARY_DATATYPE_ARG = {"query_binary_values": 1, "write_binary_values": 2}
+DEFAULT_BINARY_DATATYPE = "f"
+
+def _size(value, datatype=None):
+    """
+    Size of a message or result in bytes.
+    datatype: struct format of the elements of a list returned by or passed to
+    *_binary_values, so e.g. a list of 'H' values counts 2 bytes per element.
+    """
+    if value is None:
+        return 0
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    if isinstance(value, (str, bytes, bytearray)) or datatype is None:
+        try:
+            return len(value)
+        except TypeError:
+            return 0
+    if datatype in ("s", "p"):
+        # A single bytes object per block
+        return sum(len(item) for item in value)
+    return len(value) * struct.calcsize(datatype)
+
+def _binary_datatype(name, args, kwargs):
+    position = BINARY_DATATYPE_ARG.get(name)
+    if position is None:
+        return None
+    if "datatype" in kwargs:
+        return kwargs["datatype"]
+    return args[position] if len(args) > position else DEFAULT_BINARY_DATATYPE
+
+def _is_timeout(ex):
+    return isinstance(ex, TimeoutError) or getattr(ex, "error_code", None) == VISA_TIMEOUT_ERROR_CODE
+
+class Tracer(object):
+    """
+    In-memory statistics of bus transactions, keyed by method and command key.
+
+    For every key the tracer keeps the count, bytes sent and received,
+    total and maximum latency, the number of timeouts and other errors
+    and a log2 histogram of the latency in microseconds.
+
+    If path is given, the statistics are written there as JSON every
+    dump_interval seconds (checked when a transaction is recorded) and on dump().
+    A failed periodic dump is logged and never raised into the traced call.
+    If log is given (e.g. print or logging.debug), every transaction is
+    also reported to it. This is slow and meant for debugging only.
+    """
+    def __init__(self, path=None, dump_interval=60.0, log=None, clock=time.perf_counter):
+        self.path = path
+        self.dump_interval = dump_interval
+        self.log = log
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.stats = {}
+        self.started = time.time()
+        self._last_dump = clock()
+
+    def record(self, method, message, latency, bytes_out=0, bytes_in=0, error=None):
+        key = (method, command_key(message) if message is not None else "")
+        with self._lock:
+            entry = self.stats.get(key)
+            if entry is None:
+                entry = self.stats[key] = {
+                    "count": 0, "bytes_out": 0, "bytes_in": 0,
+                    "total_time": 0.0, "max_time": 0.0,
+                    "timeouts": 0, "errors": 0,
+                    "histogram": [0] * HISTOGRAM_BUCKETS,
+                }
+            entry["count"] += 1
+            entry["bytes_out"] += bytes_out
+            entry["bytes_in"] += bytes_in
+            entry["total_time"] += latency
+            if latency > entry["max_time"]:
+                entry["max_time"] = latency
+            bucket = min(int(latency * 1e6).bit_length(), HISTOGRAM_BUCKETS - 1)
+            entry["histogram"][bucket] += 1
+            if error is not None:
+                if _is_timeout(error):
+                    entry["timeouts"] += 1
+                else:
+                    entry["errors"] += 1
+        if self.log is not None:
+            self.log("{} {!r}: {:.3f} ms{}".format(method, message, latency * 1000,
+                                                  " ({})".format(error) if error is not None else ""))
+        if self.path is not None:
+            # One thread claims the periodic dump, the others carry on
+            with self._lock:
+                now = self._clock()
+                due = now - self._last_dump >= self.dump_interval
+                if due:
+                    self._last_dump = now
+            if due:
+                try:
+                    self.dump()
+                except Exception:
+                    logger.warning("Could not write the trace to %s", self.path, exc_info=True)
+
+    def snapshot(self):
+        """Copy of the statistics as a JSON-serializable dict"""
+        with self._lock:
+            commands = [
+                dict(entry, method=method, command=command, histogram=list(entry["histogram"]))
+                for (method, command), entry in self.stats.items()
+            ]
+        commands.sort(key=lambda entry: entry["total_time"], reverse=True)
+        return {"started": self.started, "time": time.time(), "commands": commands}
+
+    def dump(self, path=None):
+        """Atomically write the statistics as JSON to path (default: self.path)"""
+        path = path or self.path
+        with self._lock:
+            self._last_dump = self._clock()
+        # Per-thread temporary file, so concurrent dumps do not replace each other's
+        tmp_path = "{}.{}.tmp".format(path, threading.get_ident())
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f, indent=1)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def report(self, count=10):
+        """Text table of the commands that took the most bus time"""
+        commands = self.snapshot()["commands"]
+        lines = ["{:>8} {:>10} {:>9} {:>9} {:>6}  {}".format(
+            "count", "total ms", "mean ms", "max ms", "errors", "command")]
+        for entry in commands[:count]:
+            lines.append("{:>8} {:>10.1f} {:>9.3f} {:>9.3f} {:>6}  {} {}".format(
+                entry["count"], entry["total_time"] * 1000,
+                entry["total_time"] * 1000 / entry["count"], entry["max_time"] * 1000,
+                entry["timeouts"] + entry["errors"], entry["method"], entry["command"]))
+        return "\n".join(lines)
+
+class TracedResource(object):
+    """
+    Proxy for a PyVISA resource that records every bus transaction in a Tracer.
+    Attribute reads and writes (timeout, read_termination, ...) and all
+    other methods are forwarded to the wrapped resource.
+    """
+    def __init__(self, inst, tracer):
+        object.__setattr__(self, "inst", inst)
+        object.__setattr__(self, "tracer", tracer)
+        for name in TRACED_METHODS:
+            if hasattr(inst, name):
+                object.__setattr__(self, name, self._traced(name, getattr(inst, name)))
+
+    def __getattr__(self, name):
+        return getattr(self.inst, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.inst, name, value)
+
+    def _traced(self, name, method):
+        tracer = self.tracer
+        clock = tracer._clock
+        sends = name.startswith(("write", "query"))
+        receives = name.startswith(("read", "query"))
+
+        def traced(*args, **kwargs):
+            message = args[0] if sends and args else None
+            datatype = _binary_datatype(name, args, kwargs)
+            bytes_out = _size(message)
+            if name == "write_binary_values":
+                values = kwargs.get("values", args[1] if len(args) > 1 else None)
+                bytes_out += _size(values, datatype)
+            start = clock()
+            try:
+                result = method(*args, **kwargs)
+            except Exception as ex:
+                tracer.record(name, message, clock() - start, bytes_out, 0, ex)
+                raise
+            tracer.record(name, message, clock() - start, bytes_out,
+                          _size(result, datatype) if receives else 0)
+            return result
+        traced.__name__ = name
+        return traced
+
+def trace(inst, tracer=None):
+    """
+    Wrap inst in a TracedResource if a tracer is given.
+    Without a tracer the resource is returned unchanged, so disabled
+    tracing costs nothing.
+    """
+    if tracer is None or isinstance(inst, TracedResource):
+        return inst
+    return TracedResource(inst, tracer)
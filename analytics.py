@@ -0,0 +1,140 @@
+"""
+Векторный анализ разряда по журналу целиком за один проход NumPy.
+
+Ёмкость и энергия интегрируются по току и напряжению (метод трапеций)
+и сравниваются с показаниями прибора (:MEAS:CAP? / :MEAS:WATT?).
+Дополнительно считаются dV/dt, ёмкость при достижении порогов напряжения,
+напряжение плато и скачки внутреннего сопротивления на ступенях тока.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+# Пороги напряжения, В, для которых определяется отданная ёмкость
+DEFAULT_THRESHOLDS = (3.7, 3.5, 3.3, 3.0, 2.75, 2.5)
+# Минимальное изменение тока между соседними отсчётами, А, считающееся ступенью
+DEFAULT_STEP_CURRENT = 0.01
+# Доля отданной ёмкости, по которой оценивается плато
+PLATEAU_RANGE = (0.2, 0.8)
+
+DischargeAnalysis = namedtuple("DischargeAnalysis", [
+    "duration",             # длительность, с
+    "capacity",             # интеграл тока, мА·ч
+    "energy",               # интеграл V·I, Вт·ч
+    "instrument_capacity",  # последнее показание прибора, мА·ч (None, если нет данных)
+    "instrument_energy",    # последнее показание прибора, Вт·ч
+    "capacity_deviation",   # (интеграл - прибор) / прибор
+    "energy_deviation",
+    "avg_current",          # средний ток (по времени), А
+    "avg_voltage",          # среднее напряжение (по времени), В
+    "plateau_voltage",      # медиана напряжения в диапазоне PLATEAU_RANGE ёмкости, В
+    "capacity_at_voltage",  # {порог, В: ёмкость, мА·ч} для достигнутых порогов
+    "dvdt",                 # массив dV/dt по отсчётам, В/с
+    "resistance_steps",     # структурированный массив: time, delta_current, delta_voltage, resistance
+])
+
+RESISTANCE_STEP_DTYPE = np.dtype([
+    ('time', 'f8'),
+    ('delta_current', 'f8'),
+    ('delta_voltage', 'f8'),
+    ('resistance', 'f8'),
+])
+
+def cumulative_trapezoid(y, t):
+    """Накопленный интеграл методом трапеций, первое значение 0"""
+    return np.concatenate(([0.0], np.cumsum((y[1:] + y[:-1]) * 0.5 * np.diff(t))))
+
+def _deviation(value, reference):
+    if reference is None or reference == 0:
+        return None
+    return (value - reference) / reference
+
+def _capacity_at_thresholds(voltage, capacity, thresholds):
+    """Ёмкость в момент первого пересечения каждого порога сверху вниз (с интерполяцией)"""
+    thresholds = np.asarray(thresholds, dtype=float)
+    below = voltage[None, :] <= thresholds[:, None]
+    reached = below.any(axis=1)
+    idx = below.argmax(axis=1)
+    result = {}
+    for thr, ok, i in zip(thresholds, reached, idx):
+        if not ok:
+            continue
+        if i == 0 or voltage[i - 1] == voltage[i]:
+            result[float(thr)] = float(capacity[i])
+        else:
+            k = (voltage[i - 1] - thr) / (voltage[i - 1] - voltage[i])
+            result[float(thr)] = float(capacity[i - 1] + k * (capacity[i] - capacity[i - 1]))
+    return result
+
+def analyze_discharge(t, voltage, current, instrument_capacity=None, instrument_energy=None,
+                      thresholds=DEFAULT_THRESHOLDS, step_current=DEFAULT_STEP_CURRENT):
+    """
+    Анализ разряда.
+    t - время отсчётов, с (монотонно), voltage - В, current - А.
+    instrument_capacity / instrument_energy - массивы показаний прибора (мА·ч / Вт·ч) или None.
+    Возвращает DischargeAnalysis.
+    """
+    t = np.asarray(t, dtype=float)
+    voltage = np.asarray(voltage, dtype=float)
+    current = np.asarray(current, dtype=float)
+
+    charge = cumulative_trapezoid(current, t) / 3.6            # А·с -> мА·ч
+    energy = cumulative_trapezoid(voltage * current, t) / 3600  # Вт·с -> Вт·ч
+    duration = float(t[-1] - t[0]) if len(t) else 0.0
+    total_capacity = float(charge[-1]) if len(charge) else 0.0
+    total_energy = float(energy[-1]) if len(energy) else 0.0
+
+    inst_capacity = float(np.asarray(instrument_capacity)[-1]) if instrument_capacity is not None and len(t) else None
+    inst_energy = float(np.asarray(instrument_energy)[-1]) if instrument_energy is not None and len(t) else None
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        dvdt = np.gradient(voltage, t) if len(t) > 1 else np.zeros_like(voltage)
+    dvdt[~np.isfinite(dvdt)] = np.nan
+
+    if total_capacity > 0:
+        lo, hi = PLATEAU_RANGE
+        plateau = (charge >= lo * total_capacity) & (charge <= hi * total_capacity)
+        plateau_voltage = float(np.median(voltage[plateau])) if plateau.any() else float(np.median(voltage))
+    else:
+        plateau_voltage = float(np.median(voltage)) if len(voltage) else None
+
+    delta_current = np.diff(current)
+    delta_voltage = np.diff(voltage)
+    steps = np.flatnonzero(np.abs(delta_current) >= step_current)
+    resistance_steps = np.empty(len(steps), dtype=RESISTANCE_STEP_DTYPE)
+    resistance_steps['time'] = t[steps + 1] - t[0] if len(t) else []
+    resistance_steps['delta_current'] = delta_current[steps]
+    resistance_steps['delta_voltage'] = delta_voltage[steps]
+    resistance_steps['resistance'] = -delta_voltage[steps] / delta_current[steps]
+
+    avg_current = total_capacity * 3.6 / duration if duration > 0 else (float(current.mean()) if len(current) else None)
+    avg_voltage = total_energy * 3600 / (total_capacity * 3.6) if total_capacity > 0 else plateau_voltage
+
+    return DischargeAnalysis(
+        duration=duration,
+        capacity=total_capacity,
+        energy=total_energy,
+        instrument_capacity=inst_capacity,
+        instrument_energy=inst_energy,
+        capacity_deviation=_deviation(total_capacity, inst_capacity),
+        energy_deviation=_deviation(total_energy, inst_energy),
+        avg_current=avg_current,
+        avg_voltage=avg_voltage,
+        plateau_voltage=plateau_voltage,
+        capacity_at_voltage=_capacity_at_thresholds(voltage, charge, thresholds),
+        dvdt=dvdt,
+        resistance_steps=resistance_steps,
+    )
+
+def analyze_log_data(data, **kwargs):
+    """Анализ DataFrame журнала (колонки datetime, voltage, current, capacity, watthours)"""
+    datetimes = data['datetime'].to_numpy(dtype='datetime64[ns]')
+    t = (datetimes - datetimes[0]).astype('timedelta64[ns]').astype(np.int64) / 1e9 if len(datetimes) else np.empty(0)
+    return analyze_discharge(
+        t,
+        data['voltage'].to_numpy(),
+        data['current'].to_numpy(),
+        instrument_capacity=data['capacity'].to_numpy() if 'capacity' in data else None,
+        instrument_energy=data['watthours'].to_numpy() if 'watthours' in data else None,
+        **kwargs
+    )
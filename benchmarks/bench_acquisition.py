@@ -0,0 +1,146 @@
+"""
+Производительность сбора данных на симулированной нагрузке DL3021 (без приборов).
+
+Для каждого варианта драйвера измеряются время настройки, задержка одного
+опроса всех величин (медиана, 95-й перцентиль) и предельная частота отсчётов.
+Дополнительно - время поиска нагрузок с пустым и заполненным кэшем
+инвентаризации и цикл connect.run_discharge с минимальным периодом.
+
+Задержка шины задаётся параметрами --latency (на сообщение)
+и --command-latency (на команду в сообщении).
+
+Пример:
+    python benchmarks/bench_acquisition.py --samples 200 --latency 0.004
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from LabInstruments.DL3000 import DL3000, MEASUREMENTS
+from LabInstruments.Inventory import InventoryCache, find_instruments
+from LabInstruments.SimulatedDL3000 import BatteryModel, SimulatedDL3000Resource, SimulatedResourceManager
+from sampler import MIN_INTERVAL
+
+def measure_separately(inst):
+    """Прежний способ: отдельный запрос на каждую величину"""
+    return [inst.inst.query(query) for query in MEASUREMENTS.values()]
+
+def set_battery_vstop_separately(inst, vstop):
+    """Прежний способ: каждое нажатие клавиши отдельным сообщением"""
+    inst.inst.write(":DEBUG:KEY ON")
+    inst.set_app_mode("BATTERY")
+    inst.inst.write(":SYSTEM:KEY 16")
+    inst.inst.write(":SYSTEM:KEY 16")
+    for char in f"{vstop:.3f}":
+        inst.inst.write(":SYSTEM:KEY 30" if char == '.' else f":SYSTEM:KEY {20 + int(char)}")
+    inst.inst.write(":SYSTEM:KEY 41")
+    inst.inst.write(":DEBUG:KEY OFF")
+
+def setup_separately(inst, vstop, cc):
+    inst.reset()
+    inst.set_app_mode("BATTERY")
+    set_battery_vstop_separately(inst, vstop)
+    inst.set_cc_current(cc)
+
+def setup_batched(inst, vstop, cc):
+    with inst.batch():
+        inst.reset()
+        inst.set_app_mode("BATTERY")
+        inst.set_battery_vstop(vstop)
+        inst.set_cc_current(cc)
+
+DRIVERS = [
+    ("отдельные запросы", setup_separately, measure_separately),
+    ("пакеты и составной запрос", setup_batched, lambda inst: inst.measure_all()),
+]
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+def bench_driver(name, setup, measure, args):
+    resource = SimulatedDL3000Resource(BatteryModel(speed=args.speed), latency=args.latency,
+                                       command_latency=args.command_latency)
+    inst = DL3000(resource)
+    start = time.perf_counter()
+    setup(inst, 2.5, 0.05)
+    setup_time = time.perf_counter() - start
+    inst.enable()
+
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(args.samples):
+        t0 = time.perf_counter()
+        measure(inst)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    inst.disable()
+
+    print(f"{name}:")
+    print(f"  настройка: {setup_time * 1000:.1f} мс")
+    print(f"  опрос: медиана {statistics.median(latencies) * 1000:.2f} мс, "
+          f"95% {percentile(latencies, 0.95) * 1000:.2f} мс")
+    print(f"  отсчётов в секунду: {args.samples / elapsed:.1f}")
+
+def bench_discovery(args):
+    rm = SimulatedResourceManager(args.devices, latency=args.latency, command_latency=args.command_latency)
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = InventoryCache(os.path.join(tmp, "inventory.json"))
+        for label in ("пустой кэш", "кэш заполнен"):
+            start = time.perf_counter()
+            results = find_instruments(rm, match=lambda idn: "DL30" in idn, cache=cache, background=False)
+            elapsed = time.perf_counter() - start
+            for result in results:
+                result.resource.close()
+            print(f"Поиск {len(results)} нагрузок ({label}): {elapsed * 1000:.1f} мс")
+
+def bench_connect_loop(args):
+    try:
+        import connect
+    except ImportError as e:
+        # connect.py использует msvcrt и запускается только в Windows
+        print(f"Цикл connect.run_discharge пропущен: {e}")
+        return
+    resource = SimulatedDL3000Resource(BatteryModel(speed=args.speed), latency=args.latency,
+                                       command_latency=args.command_latency)
+    with tempfile.TemporaryDirectory() as tmp:
+        params = {
+            'battery_name': 'sim', 'battery_capacity': '200', 'vstop': 2.5, 'cc': 0.05,
+            'interval': MIN_INTERVAL, 'binary_log': False,
+            'log_filename': os.path.join(tmp, 'sim.csv'),
+        }
+        device = {'resource_str': 'SIM', 'idn': resource.idn, 'resource': resource}
+        count = [0]
+
+        def on_sample(sample, stats):
+            count[0] += 1
+
+        sampler, _ = connect.run_discharge(DL3000(resource), device, params,
+                                           stop=lambda: count[0] >= args.loop_samples, on_sample=on_sample)
+    print(f"Цикл connect.run_discharge: {sampler.summary()}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Производительность сбора данных на симулированной DL3021")
+    parser.add_argument('--samples', type=int, default=200, help="отсчётов на вариант драйвера")
+    parser.add_argument('--latency', type=float, default=0.002, help="задержка на сообщение, с")
+    parser.add_argument('--command-latency', type=float, default=0.0005, help="задержка на команду, с")
+    parser.add_argument('--devices', type=int, default=4, help="симулированных нагрузок при поиске")
+    parser.add_argument('--speed', type=float, default=60.0, help="ускорение времени батареи")
+    parser.add_argument('--loop-samples', type=int, default=50,
+                        help="отсчётов цикла connect.run_discharge (0 - не запускать)")
+    args = parser.parse_args()
+
+    print(f"Задержка: {args.latency * 1000:g} мс на сообщение + {args.command_latency * 1000:g} мс на команду\n")
+    for name, setup, measure in DRIVERS:
+        bench_driver(name, setup, measure, args)
+    print()
+    bench_discovery(args)
+    if args.loop_samples:
+        bench_connect_loop(args)
+
+if __name__ == "__main__":
+    main()
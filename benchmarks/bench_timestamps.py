@@ -0,0 +1,92 @@
+"""
+Сравнение прежнего (построчного) и векторного разбора меток времени
+и формирования подписей в charts.py на синтетическом журнале.
+
+Пример:
+    python benchmarks/bench_timestamps.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from charts import parse_timestamps, make_time_labels
+
+def synthetic_timestamps(rows, with_date):
+    """Метки с периодом 1 с, начинающиеся за полчаса до полуночи (переход через сутки)"""
+    start = pd.Timestamp('2025-09-08 23:30:00')
+    stamps = pd.Series(start + pd.to_timedelta(np.arange(rows), unit='s'))
+    return stamps.dt.strftime('%d-%m-%Y %H:%M:%S' if with_date else '%H:%M:%S')
+
+def legacy_parse(timestamps):
+    """Прежняя реализация из plot_battery_data (цикл с datetime.combine)"""
+    has_date = timestamps.str.contains(r'\d{2}-\d{2}-\d{4}')
+    if has_date.any():
+        return pd.to_datetime(timestamps, format='%d-%m-%Y %H:%M:%S'), has_date
+    base_date = datetime.today().date()
+    times = pd.to_datetime(timestamps, format='%H:%M:%S').dt.time
+    datetimes = []
+    current_date = base_date
+    previous_time = times.iloc[0]
+    for t in times:
+        if t < previous_time:
+            current_date += timedelta(days=1)
+        datetimes.append(datetime.combine(current_date, t))
+        previous_time = t
+    return pd.to_datetime(datetimes), has_date
+
+def legacy_labels(datetimes, has_date):
+    """Прежнее формирование подписей (списковые включения со strftime)"""
+    datetimes = pd.Series(datetimes).sort_values()
+    time_labels = datetimes.dt.strftime('%H:%M:%S')
+    if datetimes.dt.date.nunique() > 1:
+        if has_date.any():
+            time_labels = [dt.strftime('%d.%m.%y') + '<br>' + dt.strftime('%H:%M:%S') for dt in datetimes]
+        else:
+            last_date = datetimes.iloc[-1].date()
+            time_labels = [
+                f"(вчера)<br>{dt.strftime('%H:%M:%S')}" if dt.date() < last_date else dt.strftime('%H:%M:%S')
+                for dt in datetimes
+            ]
+    return time_labels
+
+def vectorized_labels(datetimes, has_date):
+    datetimes = pd.Series(datetimes)
+    if not datetimes.is_monotonic_increasing:
+        datetimes = datetimes.sort_values()
+    multiday = datetimes.iloc[0].date() != datetimes.iloc[-1].date()
+    return make_time_labels(datetimes, has_date, last_day=datetimes.iloc[-1] if multiday else None)
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк разбора меток времени charts.py")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    for with_date in (False, True):
+        timestamps = synthetic_timestamps(args.rows, with_date)
+        title = "с датой" if with_date else "без даты"
+
+        t_old_parse, (old_dt, old_has_date) = timed(legacy_parse, timestamps)
+        t_new_parse, (new_dt, new_has_date) = timed(parse_timestamps, timestamps)
+        t_old_labels, old_labels = timed(legacy_labels, old_dt, old_has_date)
+        t_new_labels, new_labels = timed(vectorized_labels, new_dt, new_has_date)
+
+        assert (pd.Series(old_dt).to_numpy() == new_dt.to_numpy()).all(), "метки времени не совпадают"
+        assert list(old_labels) == list(new_labels), "подписи не совпадают"
+
+        print(f"\n{args.rows} строк, метки {title}:")
+        print(f"  разбор:  {t_old_parse:8.3f} с -> {t_new_parse:8.3f} с  (x{t_old_parse / t_new_parse:.1f})")
+        print(f"  подписи: {t_old_labels:8.3f} с -> {t_new_labels:8.3f} с  (x{t_old_labels / t_new_labels:.1f})")
+
+if __name__ == "__main__":
+    main()
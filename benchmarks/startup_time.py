@@ -0,0 +1,88 @@
+"""
+Измерение времени холодного старта connect.py (импорт модулей) с порогом регрессии.
+
+Каждый замер - отдельный процесс интерпретатора, поэтому кэш импортов
+не переиспользуется. Из времени импорта connect вычитается время запуска
+пустого интерпретатора, порог применяется к разнице (медиане).
+Дополнительно проверяется, что на пути сбора данных не загружается
+стек анализа и графиков.
+
+Пример:
+    python benchmarks/startup_time.py --runs 15 --budget 0.5
+Код возврата 1 - бюджет превышен или загружены запрещённые модули.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которые не должны загружаться до первого отсчёта
+HEAVY_MODULES = ['pandas', 'plotly', 'numpy', 'matplotlib', 'charts']
+
+def run_python(code, extra_args=()):
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, *extra_args, '-c', code], cwd=REPO_ROOT,
+                          capture_output=True, text=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode != 0:
+        raise RuntimeError(f"Ошибка при выполнении {code!r}:\n{proc.stderr}")
+    return elapsed, proc
+
+def measure(code, runs):
+    return [run_python(code)[0] for _ in range(runs)]
+
+def slowest_imports(module, count=10):
+    """Самые медленные импорты по данным python -X importtime"""
+    _, proc = run_python(f"import {module}", extra_args=('-X', 'importtime'))
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = [part.strip() for part in line[len('import time:'):].split('|')]
+        rows.append((int(cumulative_us), int(self_us), name))
+    return sorted(rows, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description="Время холодного старта пути сбора данных")
+    parser.add_argument('--module', default='connect', help="измеряемый модуль (по умолчанию connect)")
+    parser.add_argument('--runs', type=int, default=10, help="число замеров")
+    parser.add_argument('--budget', type=float, default=0.5,
+                        help="допустимое время импорта сверх пустого интерпретатора, с")
+    args = parser.parse_args()
+
+    baseline = measure('pass', args.runs)
+    startup = measure(f'import {args.module}', args.runs)
+    base_median = statistics.median(baseline)
+    median = statistics.median(startup)
+    import_cost = median - base_median
+
+    print(f"Пустой интерпретатор: медиана {base_median * 1000:.0f} мс")
+    print(f"import {args.module}: медиана {median * 1000:.0f} мс, "
+          f"мин {min(startup) * 1000:.0f} мс, макс {max(startup) * 1000:.0f} мс")
+    print(f"Стоимость импорта: {import_cost * 1000:.0f} мс (бюджет {args.budget * 1000:.0f} мс)")
+
+    print("\nСамые медленные импорты (накопительно, мкс):")
+    for cumulative, self_us, name in slowest_imports(args.module):
+        print(f"  {cumulative:>9} {self_us:>9}  {name}")
+
+    _, proc = run_python(f"import sys, {args.module}; print(' '.join(sorted(sys.modules)))")
+    loaded = set(proc.stdout.split())
+    heavy = [m for m in HEAVY_MODULES if m in loaded]
+
+    failed = False
+    if heavy:
+        print(f"\nОШИБКА: при старте загружены тяжёлые модули: {', '.join(heavy)}")
+        failed = True
+    if import_cost > args.budget:
+        print(f"\nОШИБКА: бюджет времени старта превышен на {(import_cost - args.budget) * 1000:.0f} мс")
+        failed = True
+    if not failed:
+        print("\nOK: бюджет времени старта соблюдён")
+    sys.exit(1 if failed else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+Компактный двоичный формат журнала разряда (*.dlb).
+
+Структура файла:
+    8 байт   - сигнатура MAGIC
+    4 байта  - длина заголовка (uint32, little-endian)
+    заголовок - JSON (utf-8): метаданные батареи и список колонок,
+                дополнен пробелами так, чтобы данные начинались с кратного 8 смещения
+    записи   - фиксированной длины: int64 метка времени + float64 на каждую колонку
+
+Метка времени - локальное время в наносекундах от 1970-01-01 (без часового пояса),
+так же как в CSV-журнале. Время разряда хранится в секундах.
+Записи только дописываются в конец, файл читается через numpy.memmap без разбора текста.
+"""
+import csv
+import json
+import os
+import struct
+import sys
+from datetime import datetime, timedelta
+
+from log_writer import BufferedLogWriter
+
+MAGIC = b'DLBIN\x00\x01\x00'
+BINLOG_EXT = '.dlb'
+COLUMNS = ['voltage', 'current', 'power', 'resistance', 'capacity', 'watthours', 'discharging_time']
+TIMESTAMP_FORMATS = ('%d-%m-%Y %H:%M:%S', '%d-%m-%Y %H:%M:%S.%f')
+
+_EPOCH = datetime(1970, 1, 1)
+_HEADER_LEN = struct.Struct('<I')
+
+def _timestamp_ns(value):
+    """Метка времени (epoch float, datetime или строка CSV) -> локальные нс"""
+    if isinstance(value, str):
+        for fmt in TIMESTAMP_FORMATS:
+            try:
+                value = datetime.strptime(value, fmt)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(f"Неизвестный формат метки времени: {value}")
+    elif not isinstance(value, datetime):
+        value = datetime.fromtimestamp(value)
+    delta = value - _EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1_000_000_000 + delta.microseconds * 1000
+
+def _parse_duration(value):
+    """Время разряда прибора 'ч:м:с' -> секунды"""
+    if isinstance(value, str):
+        seconds = 0.0
+        for part in value.split(':'):
+            seconds = seconds * 60 + float(part)
+        return seconds
+    return float(value)
+
+def _format_duration(seconds):
+    """Секунды -> 'ч:м:с' в формате прибора"""
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds // 60 % 60}:{seconds % 60}"
+
+def read_header(f):
+    """Читает заголовок из открытого файла. Возвращает (метаданные, смещение данных)"""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Файл не является двоичным журналом разряда")
+    (length,) = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+    meta = json.loads(f.read(length).decode('utf-8'))
+    return meta, len(MAGIC) + _HEADER_LEN.size + length
+
+def _encode_header(meta):
+    raw = json.dumps(meta, ensure_ascii=False).encode('utf-8')
+    prefix = len(MAGIC) + _HEADER_LEN.size
+    raw += b' ' * (-(prefix + len(raw)) % 8)
+    return MAGIC + _HEADER_LEN.pack(len(raw)) + raw
+
+class BinaryLogWriter(BufferedLogWriter):
+    """
+    Писатель двоичного журнала с тем же интерфейсом, буферизацией и ротацией,
+    что и CsvLogWriter (см. BufferedLogWriter): write(dict) / flush() / close().
+    При дозаписи в существующий файл колонки должны совпадать,
+    недописанная последняя запись отрезается. Каждый файл ротации
+    начинается с заголовка с теми же метаданными.
+    """
+    def __init__(self, filename, metadata=None, columns=COLUMNS, **kwargs):
+        self.columns = list(columns)
+        self._record = struct.Struct('<q' + 'd' * len(self.columns))
+        self._new_metadata = metadata
+        self.metadata = None
+        super().__init__(filename, **kwargs)
+
+    def _open_file(self, filename):
+        if os.path.isfile(filename) and os.path.getsize(filename) > 0:
+            with open(filename, 'rb+') as f:
+                meta, offset = read_header(f)
+                if meta['columns'] != self.columns:
+                    raise ValueError(f"Колонки файла {filename} не совпадают: {meta['columns']}")
+                size = f.seek(0, os.SEEK_END)
+                f.truncate(size - (size - offset) % self._record.size)
+            if self.metadata is None:
+                self.metadata = meta
+            return open(filename, 'ab')
+        if self.metadata is None:
+            self.metadata = dict(self._new_metadata or {}, columns=self.columns,
+                                 created=datetime.now().isoformat())
+        f = open(filename, 'wb')
+        f.write(_encode_header(self.metadata))
+        return f
+
+    def _write_row(self, data):
+        """Записывает строку (dict с timestamp и колонками)"""
+        values = [_parse_duration(data[c]) if c == 'discharging_time' else float(data[c]) for c in self.columns]
+        self._file.write(self._record.pack(_timestamp_ns(data['timestamp']), *values))
+
+def read_binlog(filename):
+    """
+    Открывает двоичный журнал через numpy.memmap.
+    Возвращает (метаданные, структурированный массив) без копирования данных.
+    """
+    import numpy as np
+
+    with open(filename, 'rb') as f:
+        meta, offset = read_header(f)
+        size = f.seek(0, os.SEEK_END)
+    dtype = np.dtype([('timestamp', '<i8')] + [(c, '<f8') for c in meta['columns']])
+    count = (size - offset) // dtype.itemsize
+    if count == 0:
+        return meta, np.zeros(0, dtype=dtype)
+    return meta, np.memmap(filename, dtype=dtype, mode='r', offset=offset, shape=(count,))
+
+def binlog_to_dataframe(filename):
+    """Загружает двоичный журнал в pandas.DataFrame с колонкой datetime"""
+    import pandas as pd
+
+    meta, records = read_binlog(filename)
+    data = pd.DataFrame({c: records[c] for c in meta['columns']})
+    data.insert(0, 'datetime', pd.to_datetime(records['timestamp'], unit='ns'))
+    return meta, data
+
+def csv_to_binlog(csv_filename, bin_filename=None, metadata=None):
+    """Преобразует CSV-журнал connect.py в двоичный. Возвращает имя файла"""
+    if bin_filename is None:
+        bin_filename = os.path.splitext(csv_filename)[0] + BINLOG_EXT
+    with open(csv_filename, newline='') as f, BinaryLogWriter(bin_filename, metadata, flush_rows=4096) as writer:
+        for row in csv.DictReader(f):
+            writer.write(row)
+    return bin_filename
+
+def binlog_to_csv(bin_filename, csv_filename=None):
+    """Преобразует двоичный журнал обратно в CSV-журнал connect.py. Возвращает имя файла"""
+    if csv_filename is None:
+        csv_filename = os.path.splitext(bin_filename)[0] + '.csv'
+    meta, records = read_binlog(bin_filename)
+    columns = meta['columns']
+    # Миллисекунды пишутся, только если они есть хотя бы в одной записи
+    precise = bool((records['timestamp'] % 1_000_000_000).any())
+    with open(csv_filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['timestamp'] + columns)
+        for record in records.tolist():
+            dt = _EPOCH + timedelta(microseconds=record[0] // 1000)
+            timestamp = dt.strftime(TIMESTAMP_FORMATS[1])[:-3] if precise else dt.strftime(TIMESTAMP_FORMATS[0])
+            values = [_format_duration(v) if c == 'discharging_time' else repr(v) for c, v in zip(columns, record[1:])]
+            writer.writerow([timestamp] + values)
+    return csv_filename
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Использование: python binlog.py <журнал.csv | журнал{BINLOG_EXT}> [выходной файл]")
+        sys.exit(1)
+    source = sys.argv[1]
+    target = sys.argv[2] if len(sys.argv) > 2 else None
+    if source.lower().endswith(BINLOG_EXT):
+        print(f"Создан файл: {binlog_to_csv(source, target)}")
+    else:
+        print(f"Создан файл: {csv_to_binlog(source, target)}")
@@ -1,68 +1,204 @@
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
+import argparse
+import glob
 import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
 
-import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import os
-from datetime import datetime, timedelta
+from binlog import BINLOG_EXT, binlog_to_dataframe
+from analytics import analyze_log_data
 
-def plot_battery_data(filename, battery_name=None, battery_capacity=None):
-    try:
-        # Попытка извлечь имя и ёмкость из имени файла, если не передано явно
-        if battery_name is None or battery_capacity is None:
-            base = os.path.basename(filename)
-            parts = base.split('_')
-            cap_idx = next((i for i, p in enumerate(parts) if 'mAh' in p), None)
-            if cap_idx is not None:
-                battery_capacity = parts[cap_idx].replace('mAh', '')
-                battery_name = ' '.join(parts[:cap_idx])
-            else:
-                battery_name = battery_name or "?"
-                battery_capacity = battery_capacity or "?"
-
-        data = pd.read_csv(filename)
-        required_columns = ['timestamp', 'voltage', 'current', 'power', 'capacity', 'watthours', 'resistance']
-        if not all(col in data.columns for col in required_columns):
-            raise ValueError("Файл не содержит всех необходимых колонок данных")
-
-        # Определяем, содержит ли timestamp дату
-        has_date = data['timestamp'].str.contains(r'\d{2}-\d{2}-\d{4}')
-
-        if has_date.any():
-            data['datetime'] = pd.to_datetime(data['timestamp'], format='%d-%m-%Y %H:%M:%S')
-            
+REPORT_SUFFIX = '_interactive.html'
+# Журналы connect.py в каталоге для пакетной обработки
+LOG_PATTERNS = ('*mAh_test_*.csv', '*mAh_test_*' + BINLOG_EXT)
+SUMMARY_FILENAME = 'batch_summary.csv'
+
+# Максимальное число точек одного графика после прореживания
+MAX_PLOT_POINTS = 4000
+
+def minmax_downsample(y, max_points=MAX_PLOT_POINTS):
+    """
+    Индексы точек после прореживания min/max по корзинам.
+    В каждой корзине сохраняются минимум и максимум (в порядке следования),
+    поэтому пики и провалы не теряются. Первая и последняя точки сохраняются всегда.
+    """
+    y = np.asarray(y, dtype=float)
+    n = y.shape[0]
+    if n <= max_points:
+        return np.arange(n)
+
+    buckets = max(max_points // 2, 1)
+    size = -(-n // buckets)
+    rows = -(-n // size)
+    padded = np.full(rows * size, np.nan)
+    padded[:n] = y
+    # NaN (дополнение и пропуски) не должны попадать в min/max
+    blocks = np.ma.masked_invalid(padded.reshape(rows, size))
+    offsets = np.arange(rows) * size
+    idx_min = offsets + blocks.argmin(axis=1, fill_value=np.inf)
+    idx_max = offsets + blocks.argmax(axis=1, fill_value=-np.inf)
+    idx = np.concatenate(([0, n - 1], idx_min, idx_max))
+    return np.unique(np.minimum(idx, n - 1))
+
+def _digit_columns(strings, width):
+    """Массив строк одинаковой длины -> матрица цифр (n, width)"""
+    return strings.astype(f'U{width}').view(np.uint32).reshape(-1, width).astype(np.int64) - ord('0')
+
+def _number(digits, start, stop):
+    """Число из столбцов цифр [start, stop)"""
+    result = digits[:, start]
+    for i in range(start + 1, stop):
+        result = result * 10 + digits[:, i]
+    return result
+
+def _parse_fixed_width(strings, has_date, fraction):
+    """
+    Разбор меток фиксированной ширины ('ДД-ММ-ГГГГ ЧЧ:ММ:СС[.ммм]' или 'ЧЧ:ММ:СС[.ммм]')
+    арифметикой над кодами символов, без посимвольного разбора формата.
+    Возвращает datetime64[ns] (для меток без даты - время от начала суток, timedelta64[ns]).
+    """
+    width = (19 if has_date else 8) + (4 if fraction else 0)
+    digits = _digit_columns(strings, width)
+    offset = 11 if has_date else 0
+    seconds = _number(digits, offset, offset + 2) * 3600 + _number(digits, offset + 3, offset + 5) * 60 + _number(digits, offset + 6, offset + 8)
+    result = seconds.astype('timedelta64[s]').astype('timedelta64[ns]')
+    if fraction:
+        result = result + _number(digits, offset + 9, offset + 12).astype('timedelta64[ms]')
+    if has_date:
+        months = (_number(digits, 6, 10) - 1970) * 12 + _number(digits, 3, 5) - 1
+        days = months.astype('datetime64[M]').astype('datetime64[D]') + (_number(digits, 0, 2) - 1).astype('timedelta64[D]')
+        result = days.astype('datetime64[ns]') + result
+    return result
+
+def parse_timestamps(timestamps, base_date=None):
+    """
+    Векторный разбор меток времени CSV-журнала.
+    Метки без даты (ЧЧ:ММ:СС) привязываются к base_date (по умолчанию сегодня),
+    при переходе через полночь (время меньше предыдущего) дата увеличивается на день.
+    Возвращает (Series datetime64, содержат ли метки дату)
+    """
+    first = str(timestamps.iloc[0])
+    has_date = re.search(r'\d{2}-\d{2}-\d{4}', first) is not None
+    # При периоде меньше секунды метки содержат миллисекунды
+    fraction = '.%f' if '.' in first else ''
+
+    strings = timestamps.to_numpy(dtype=str)
+    width = len(first)
+    if width == (19 if has_date else 8) + (4 if fraction else 0) and (np.char.str_len(strings) == width).all():
+        values = _parse_fixed_width(strings, has_date, fraction)
+    elif has_date:
+        values = pd.to_datetime(timestamps, format='%d-%m-%Y %H:%M:%S' + fraction).to_numpy()
+    else:
+        parsed = pd.to_datetime(timestamps, format='%H:%M:%S' + fraction)
+        values = (parsed - parsed.dt.normalize()).to_numpy()
+
+    if not has_date:
+        # Переход через полночь: время меньше предыдущего
+        rollover = np.concatenate(([0], np.cumsum(np.diff(values) < np.timedelta64(0))))
+        base = np.datetime64(base_date or datetime.today().date(), 'ns')
+        values = base + values + rollover.astype('timedelta64[D]')
+    return pd.Series(values, index=timestamps.index), has_date
+
+def _format_times(values, with_date):
+    """datetime64 -> подписи 'ЧЧ:ММ:СС' или 'ДД.ММ.ГГ<br>ЧЧ:ММ:СС' (векторно, через срезы символов)"""
+    iso = np.datetime_as_string(np.asarray(values, dtype='datetime64[s]'), unit='s').astype('U19')
+    chars = iso.view('U1').reshape(-1, 19)
+    columns = [chars[:, 11:19]]
+    if with_date:
+        dot = np.full((len(chars), 1), '.')
+        br = np.tile(np.array(list('<br>')), (len(chars), 1))
+        columns = [chars[:, 8:10], dot, chars[:, 5:7], dot, chars[:, 2:4], br] + columns
+    joined = np.ascontiguousarray(np.hstack(columns))
+    return joined.view(f'U{joined.shape[1]}').ravel()
+
+def make_time_labels(datetimes, has_date, last_day=None):
+    """
+    Векторное формирование подписей времени.
+    last_day - последний момент журнала, если журнал охватывает несколько дней:
+    тогда для журналов с датой подпись содержит дату, а без даты -
+    пометку (вчера) для всех дней кроме последнего.
+    """
+    values = np.asarray(datetimes, dtype='datetime64[ns]')
+    if last_day is None:
+        return _format_times(values, with_date=False)
+    if has_date:
+        return _format_times(values, with_date=True)
+    time_labels = _format_times(values, with_date=False)
+    yesterday = values.astype('datetime64[D]') < np.datetime64(pd.Timestamp(last_day), 'D')
+    return np.where(yesterday, np.char.add('(вчера)<br>', time_labels), time_labels)
+
+def load_csv_log(filename):
+    """
+    Загружает CSV-журнал и добавляет колонку datetime.
+    Возвращает (DataFrame, содержат ли метки времени дату)
+    """
+    data = pd.read_csv(filename)
+    required_columns = ['timestamp', 'voltage', 'current', 'power', 'capacity', 'watthours', 'resistance']
+    if not all(col in data.columns for col in required_columns):
+        raise ValueError("Файл не содержит всех необходимых колонок данных")
+
+    data['datetime'], has_date = parse_timestamps(data['timestamp'])
+    return data, has_date
+
+def load_log(filename, battery_name=None, battery_capacity=None):
+    """
+    Загружает журнал (CSV или двоичный), отсортированный по времени.
+    Имя и ёмкость батареи, если не переданы, берутся из метаданных или имени файла.
+    Возвращает (DataFrame, содержат ли метки дату, имя батареи, ёмкость)
+    """
+    if filename.lower().endswith(BINLOG_EXT):
+        # Двоичный журнал: метки времени уже в числовом виде, разбор не нужен
+        meta, data = binlog_to_dataframe(filename)
+        battery_name = battery_name or meta.get('battery_name')
+        battery_capacity = battery_capacity or meta.get('battery_capacity')
+        has_date = True
+    else:
+        data, has_date = load_csv_log(filename)
+
+    # Попытка извлечь имя и ёмкость из имени файла, если не передано явно
+    if battery_name is None or battery_capacity is None:
+        base = os.path.basename(filename)
+        parts = base.split('_')
+        cap_idx = next((i for i, p in enumerate(parts) if 'mAh' in p), None)
+        if cap_idx is not None:
+            battery_capacity = parts[cap_idx].replace('mAh', '')
+            battery_name = ' '.join(parts[:cap_idx])
         else:
-            base_date = datetime.today().date()
-            times = pd.to_datetime(data['timestamp'], format='%H:%M:%S').dt.time
-            datetimes = []
-            current_date = base_date
-            previous_time = times.iloc[0]
-            for t in times:
-                if t < previous_time:
-                    current_date += timedelta(days=1)
-                datetimes.append(datetime.combine(current_date, t))
-                previous_time = t
-            data['datetime'] = pd.to_datetime(datetimes)
+            battery_name = battery_name or "?"
+            battery_capacity = battery_capacity or "?"
 
+    if not data['datetime'].is_monotonic_increasing:
         data = data.sort_values('datetime')
+    return data, has_date, battery_name, battery_capacity
 
-        # Метки времени
-        time_labels = data['datetime'].dt.strftime('%H:%M:%S')
-        if data['datetime'].dt.date.nunique() > 1:
-            if has_date.any():
-                time_labels = [dt.strftime('%d.%m.%y') + '<br>' + dt.strftime('%H:%M:%S') for dt in data['datetime']]
-            else:
-                last_date = data['datetime'].iloc[-1].date()
-                time_labels = [
-                    f"(вчера)<br>{dt.strftime('%H:%M:%S')}" if dt.date() < last_date else dt.strftime('%H:%M:%S')
-                    for dt in data['datetime']
-                ]
-
-        avg_current = data['current'].mean()
-        avg_resistance = data['resistance'].mean()
+def summarize_log_data(data):
+    """Итоговые значения теста по полным данным журнала"""
+    total_time = data['datetime'].iloc[-1] - data['datetime'].iloc[0]
+    return {
+        'final_capacity': data['capacity'].iloc[-1],
+        'final_watthours': data['watthours'].iloc[-1],
+        'total_time': total_time,
+        'total_hours': total_time.total_seconds() / 3600,
+        'avg_current': data['current'].mean(),
+        'avg_resistance': data['resistance'].mean(),
+        'analysis': analyze_log_data(data),
+    }
+
+def plot_battery_data(filename, battery_name=None, battery_capacity=None, max_points=MAX_PLOT_POINTS, show=True):
+    """
+    Строит интерактивные графики теста и сохраняет их в <журнал>_interactive.html.
+    show=False - только сохранить файл, не открывая браузер.
+    Возвращает словарь итоговых значений или None при ошибке.
+    """
+    try:
+        data, has_date, battery_name, battery_capacity = load_log(filename, battery_name, battery_capacity)
+        totals = summarize_log_data(data)
+        avg_current = totals['avg_current']
+        avg_resistance = totals['avg_resistance']
 
         fig = make_subplots(
             rows=5, cols=1,
@@ -77,11 +213,28 @@ def plot_battery_data(filename, battery_name=None, battery_capacity=None):
             )
         )
 
-        fig.add_trace(go.Scatter(x=time_labels, y=data['voltage'], name='Напряжение', line=dict(color='red')), row=1, col=1)
-        fig.add_trace(go.Scatter(x=time_labels, y=data['power'], name='Мощность', line=dict(color='green')), row=2, col=1)
-        fig.add_trace(go.Scatter(x=time_labels, y=data['capacity'], name='Ёмкость', line=dict(color='purple')), row=3, col=1)
-        fig.add_trace(go.Scatter(x=time_labels, y=data['watthours'], name='Энергия', line=dict(color='blue')), row=4, col=1)
-        fig.add_trace(go.Scatter(x=time_labels, y=data['resistance'], name='Сопротивление', line=dict(color='orange')), row=5, col=1)
+        # Каждый график прореживается отдельно, итоги считаются по полным данным.
+        # Линии ступенчатые: значение держится до следующего отсчёта, так же
+        # правильно выглядят и журналы, записанные только при изменениях (DeadbandFilter)
+        x = data['datetime'].to_numpy()
+        # Подписи нужны только для оставшихся после прореживания точек
+        multiday = data['datetime'].iloc[0].date() != data['datetime'].iloc[-1].date()
+        tickformat = '%d.%m.%y<br>%H:%M:%S' if multiday and has_date else '%H:%M:%S'
+        traces = [
+            ('voltage', 'Напряжение', 'red'),
+            ('power', 'Мощность', 'green'),
+            ('capacity', 'Ёмкость', 'purple'),
+            ('watthours', 'Энергия', 'blue'),
+            ('resistance', 'Сопротивление', 'orange'),
+        ]
+        for row, (column, name, color) in enumerate(traces, start=1):
+            y = data[column].to_numpy()
+            idx = minmax_downsample(y, max_points)
+            labels = make_time_labels(x[idx], has_date, last_day=x[-1] if multiday else None)
+            fig.add_trace(go.Scattergl(
+                x=x[idx], y=y[idx], name=name, line=dict(color=color), line_shape='hv',
+                text=labels, hovertemplate='%{text}<br>%{y}'
+            ), row=row, col=1)
 
         fig.update_yaxes(title_text="Напряжение, В", row=1, col=1)
         fig.update_yaxes(title_text="Мощность, Вт", row=2, col=1)
@@ -96,36 +249,41 @@ def plot_battery_data(filename, battery_name=None, battery_capacity=None):
                 showline=True,
                 showticklabels=True,
                 nticks=15,
+                tickformat=tickformat,
                 row=i, col=1
             )
 
         date_range = data['datetime'].iloc[0].strftime('%d.%m.%Y')
-        if data['datetime'].iloc[0].date() != data['datetime'].iloc[-1].date():
+        if multiday:
             date_range += f" - {data['datetime'].iloc[-1].strftime('%d.%m.%Y')}"
 
         # Итоговые значения
-        final_capacity = data['capacity'].iloc[-1]
-        final_watthours = data['watthours'].iloc[-1]
-        total_time = data['datetime'].iloc[-1] - data['datetime'].iloc[0]
-        total_hours = total_time.total_seconds() / 3600
+        final_capacity = totals['final_capacity']
+        final_watthours = totals['final_watthours']
+        total_time = totals['total_time']
+        total_hours = totals['total_hours']
 
         # Формируем строку с итогами
+        analysis = totals['analysis']
         summary = f"Заявленная ёмкость {battery_capacity} мА·ч<br>Итоговая ёмкость: {final_capacity:.3f} мА·ч<br>Итоговая энергия: {final_watthours:.3f} Вт·ч<br>Время работы: {str(total_time).split('.')[0]} (≈ {total_hours:.2f} ч)"
+        summary += f"<br>По интегралу тока: {analysis.capacity:.3f} мА·ч, {analysis.energy:.3f} Вт·ч<br>Напряжение плато: {analysis.plateau_voltage:.3f} В"
 
         fig.update_layout(
             title_text=f'<b>Результаты тестирования батареи: {battery_name} ({battery_capacity} мА·ч) ({date_range})</b><br>Средний ток: {avg_current:.3f} А<br>Среднее сопротивление: {avg_resistance:.3f} Ом<br>{summary}',
             height=2200,
             showlegend=False,
             hovermode="x unified",
-            margin=dict(t=340, b=80, l=50, r=30),
+            margin=dict(t=390, b=80, l=50, r=30),
         )
 
         print(summary)
 
-        plot_filename = os.path.splitext(filename)[0] + '_interactive.html'
+        plot_filename = report_filename(filename)
         fig.write_html(plot_filename)
         print(f"Интерактивные графики сохранены в файл: {plot_filename}")
-        fig.show()
+        if show:
+            fig.show()
+        return dict(totals, battery_name=battery_name, battery_capacity=battery_capacity, plot_filename=plot_filename)
 
     except FileNotFoundError:
         print(f"Ошибка: файл {filename} не найден")
@@ -133,14 +291,105 @@ def plot_battery_data(filename, battery_name=None, battery_capacity=None):
         print(f"Ошибка при построении графиков: {str(e)}")
 
 
+def report_filename(filename):
+    return os.path.splitext(filename)[0] + REPORT_SUFFIX
+
+def report_is_fresh(filename):
+    """Отчёт существует и новее журнала"""
+    report = report_filename(filename)
+    return os.path.isfile(report) and os.path.getmtime(report) >= os.path.getmtime(filename)
+
+def find_logs(target):
+    """Журналы в каталоге (по LOG_PATTERNS) или по шаблону glob"""
+    if os.path.isdir(target):
+        files = [f for pattern in LOG_PATTERNS for f in glob.glob(os.path.join(target, pattern))]
+    else:
+        files = glob.glob(target)
+    return sorted({f for f in files if f.lower().endswith(('.csv', BINLOG_EXT))})
+
+def _batch_job(filename, render):
+    """Задача пула процессов: построить отчёт или (если он свежий) только посчитать итоги"""
+    if render:
+        return plot_battery_data(filename, show=False)
+    data, _, battery_name, battery_capacity = load_log(filename)
+    return dict(summarize_log_data(data), battery_name=battery_name, battery_capacity=battery_capacity,
+                plot_filename=report_filename(filename))
+
+def batch_plot(target, jobs=None, force=False, summary_filename=None):
+    """
+    Пакетное построение отчётов по всем журналам каталога (или шаблона glob)
+    в пуле процессов. Журналы с отчётом новее самого журнала не перестраиваются
+    (если не force). Итоги всех батарей записываются в одну сводную таблицу.
+    Возвращает имя файла сводной таблицы.
+    """
+    files = find_logs(target)
+    if not files:
+        print(f"Не найдено журналов: {target}")
+        return None
+    if summary_filename is None:
+        base_dir = target if os.path.isdir(target) else os.path.dirname(files[0])
+        summary_filename = os.path.join(base_dir, SUMMARY_FILENAME)
+
+    rows = []
+    rendered = 0
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = {}
+        for filename in files:
+            render = force or not report_is_fresh(filename)
+            rendered += render
+            futures[pool.submit(_batch_job, filename, render)] = filename
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                result = None
+                print(f"Ошибка при обработке {filename}: {e}")
+            if result is None:
+                continue
+            rows.append({
+                'file': os.path.basename(filename),
+                'battery_name': result['battery_name'],
+                'battery_capacity': result['battery_capacity'],
+                'final_capacity': result['final_capacity'],
+                'final_watthours': result['final_watthours'],
+                'total_time': str(result['total_time']).split('.')[0],
+                'total_hours': result['total_hours'],
+                'avg_current': result['avg_current'],
+                'avg_resistance': result['avg_resistance'],
+                'integrated_capacity': result['analysis'].capacity,
+                'integrated_watthours': result['analysis'].energy,
+                'capacity_deviation': result['analysis'].capacity_deviation,
+                'plateau_voltage': result['analysis'].plateau_voltage,
+                'report': os.path.basename(result['plot_filename']),
+            })
+
+    summary = pd.DataFrame(rows).sort_values('file') if rows else pd.DataFrame()
+    summary.to_csv(summary_filename, index=False)
+    print(f"Журналов: {len(files)}, построено отчётов: {rendered}, пропущено (отчёт актуален): {len(files) - rendered}")
+    print(f"Сводная таблица сохранена в файл: {summary_filename}")
+    return summary_filename
+
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Построение графиков данных тестирования батареи")
+    parser.add_argument('target', nargs='?',
+                        help="каталог или шаблон журналов для пакетной обработки (без аргумента - интерактивный режим)")
+    parser.add_argument('--jobs', type=int, default=None, help="число процессов (по умолчанию - по числу ядер)")
+    parser.add_argument('--force', action='store_true', help="перестроить все отчёты, даже актуальные")
+    parser.add_argument('--summary', default=None, help=f"файл сводной таблицы (по умолчанию {SUMMARY_FILENAME} рядом с журналами)")
+    args = parser.parse_args()
+    if args.target:
+        batch_plot(args.target, jobs=args.jobs, force=args.force, summary_filename=args.summary)
+        raise SystemExit
+
     print("Программа построения графиков данных тестирования батареи")
     print("Пример ввода пути к файлу:")
     print(r"C:\Users\UserName\Desktop\battery_test_20230815_143200.csv")
     print()
     
     while True:
-        filepath = input("Введите полный путь к CSV файлу с данными (или 'q' для выхода): ").strip()
+        filepath = input("Введите полный путь к файлу с данными (CSV или двоичному) (или 'q' для выхода): ").strip()
         
         if filepath.lower() == 'q':
             break
@@ -149,8 +398,8 @@ if __name__ == "__main__":
             print("Ошибка: файл не найден. Попробуйте снова.")
             continue
         
-        if not filepath.lower().endswith('.csv'):
-            print("Ошибка: файл должен иметь расширение .csv")
+        if not filepath.lower().endswith(('.csv', BINLOG_EXT)):
+            print(f"Ошибка: файл должен иметь расширение .csv или {BINLOG_EXT}")
             continue
         
         plot_battery_data(filepath)
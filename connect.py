@@ -1,13 +1,27 @@
 import pyvisa
 from LabInstruments.DL3000 import DL3000
+from LabInstruments.Inventory import find_instruments
+from LabInstruments.Tracing import Tracer, trace
+from sampler import (FixedRateSampler, AdaptiveSampler, MIN_INTERVAL, MAX_INTERVAL,
+                     DEFAULT_ADAPTIVE_MIN_INTERVAL, DEFAULT_ADAPTIVE_MAX_INTERVAL)
+from log_writer import CsvLogWriter, DeadbandFilter, DEFAULT_DEADBAND
+from binlog import BinaryLogWriter, BINLOG_EXT
+from online_stats import DischargeStats, format_remaining
 import msvcrt
 import time
-import csv
 from datetime import datetime
 import os
 import logging
+import threading
+import argparse
+import subprocess
+import sys
 
-from charts import plot_battery_data
+TIMESTAMP_FORMAT = '%d-%m-%Y %H:%M:%S'
+# Для периода меньше секунды в метку времени добавляются миллисекунды
+PRECISE_TIMESTAMP_FORMAT = '%d-%m-%Y %H:%M:%S.%f'
+# Максимальное ожидание установления тока после включения нагрузки, с
+STABILIZATION_TIMEOUT = 5.0
 
 class ConsoleUpdater:
     """Класс для обновления строк в консоли"""
@@ -24,100 +38,253 @@ class ConsoleUpdater:
         for i in range(len(messages), self.lines):
             print("\033[K")
 
-def find_dl3000_devices(resource_manager):
-    """Поиск подключенных устройств Rigol DL3000"""
+def plot_battery_data(*args, **kwargs):
+    """
+    Построение графиков после теста.
+    charts (pandas, plotly) импортируется только здесь, чтобы не замедлять старт сбора данных.
+    """
+    from charts import plot_battery_data as plot
+    return plot(*args, **kwargs)
+
+def start_live_chart(log_filename):
+    """Запускает живой график журнала в отдельном процессе, чтобы не тормозить цикл сбора"""
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'live_chart.py')
+    logging.info(f"Живой график: {log_filename}")
+    return subprocess.Popen([sys.executable, script, log_filename])
+
+def is_dl3000(idn):
+    return 'RIGOL' in idn and 'DL30' in idn
+
+def find_dl3000_devices(resource_manager, refresh=False, timeout=1000, cache=None, resource_classes=None):
+    """
+    Поиск подключенных устройств Rigol DL3000.
+    Известные приборы открываются напрямую по кэшу инвентаризации,
+    полный параллельный опрос - только при промахе кэша или refresh=True.
+    cache - InventoryCache (по умолчанию общий файл кэша в домашнем каталоге).
+    resource_classes - опрашиваемые классы ресурсов, например ("USB", "TCPIP");
+    None - все ресурсы (USB, TCPIP, GPIB, ASRL).
+    """
     devices = []
-    resources = resource_manager.list_resources()
-    
-    for resource_str in resources:
-        try:
-            resource = resource_manager.open_resource(resource_str)
-            idn = resource.query('*IDN?').strip()
-            if 'RIGOL' in idn and 'DL30' in idn:
-                devices.append({
-                    'resource_str': resource_str,
-                    'idn': idn,
-                    'resource': resource
-                })
-            else:
-                resource.close()
-        except:
-            continue
+    results = find_instruments(resource_manager, match=is_dl3000, cache=cache, refresh=refresh, timeout=timeout,
+                               resource_classes=resource_classes)
+    for result in sorted(results, key=lambda r: r.resource_str):
+        logging.info(f"{result.resource_str}: {result.idn} ({result.latency * 1000:.0f} мс)")
+        devices.append({
+            'resource_str': result.resource_str,
+            'idn': result.idn,
+            'resource': result.resource
+        })
     
     return devices
 
-def log_to_file(filename, data):
-    """Записывает данные в CSV файл"""
-    file_exists = os.path.isfile(filename)
-    
-    with open(filename, 'a', newline='') as f:
-        writer = csv.DictWriter(f, fieldnames=data.keys())
-        if not file_exists:
-            writer.writeheader()
-        writer.writerow(data)
+def make_log_row(sample, precise=False):
+    """Формирует строку CSV из отсчёта DL3000Sample"""
+    row = sample._asdict()
+    timestamp = datetime.fromtimestamp(sample.timestamp)
+    if precise:
+        row['timestamp'] = timestamp.strftime(PRECISE_TIMESTAMP_FORMAT)[:-3]
+    else:
+        row['timestamp'] = timestamp.strftime(TIMESTAMP_FORMAT)
+    return row
 
-def main():
-    rm = pyvisa.ResourceManager()
-    # Настройка логирования в файл
-    run_ts = datetime.now().strftime('%Y%m%d_%H%M%S')
-    os.makedirs(os.path.join(os.getcwd(), "logs"), exist_ok=True)
-    log_path = os.path.join(os.getcwd(), f"logs\\connect_run_{run_ts}.log")
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s [%(levelname)s] %(message)s',
-        handlers=[
-            logging.FileHandler(log_path, encoding='utf-8'),
-            logging.StreamHandler()
-        ]
+def format_sample(sample, stats=None):
+    """Формирует строки консоли из отсчёта DL3000Sample и текущей статистики DischargeStats"""
+    lines = (
+        "--- Текущие показания ---",
+        f"Напряжение: {sample.voltage:.6f} V",
+        f"Ток: {sample.current:.6f} A",
+        f"Мощность: {sample.power:.6f} W",
+        f"Сопротивление: {sample.resistance:.6f} Ω",
+        f"Ёмкость: {sample.capacity:.6f} Ah",
+        f"Энергия: {sample.watthours:.6f} Wh",
+        f"Время разряда: {sample.discharging_time}"
     )
-    logging.info("Старт приложения connect.py")
-    
-    print("Поиск подключенных устройств Rigol DL3000...")
-    devices = find_dl3000_devices(rm)
-    
-    if not devices:
-        print("Не найдено ни одного устройства Rigol DL3000")
-        return
-    
-    logging.info(f"Найдено устройств DL3000: {len(devices)}")
-    for i, dev in enumerate(devices, 1):
-        logging.info(f"Устройство {i}: {dev['idn']} ({dev['resource_str']})")
+    if stats is None:
+        return lines
+    return lines + ("--- Статистика ---",) + stats.lines()
 
-    device = devices[0]
-    print(f"\nПодключаемся к устройству: {device['idn']}")
-    
+def make_sampler(params):
+    """Планировщик отсчётов: адаптивный или с фиксированным периодом"""
+    if params.get('adaptive'):
+        return AdaptiveSampler(params['interval'], params['max_interval'])
+    return FixedRateSampler(params['interval'])
+
+def ask_interval():
+    """
+    Запрашивает период отсчётов, пока не будет введено допустимое значение.
+    Возвращает (interval, adaptive, max_interval); в адаптивном режиме
+    interval - минимальный период, иначе max_interval - None.
+    """
+    while True:
+        interval_input = input(f"Интервал измерений, с ({MIN_INTERVAL:g}-{MAX_INTERVAL:g}, по умолчанию 1; "
+                               f"auto - по скорости разряда): ").strip().lower()
+        adaptive = interval_input == 'auto'
+        try:
+            if adaptive:
+                min_input = input(f"Минимальный интервал, с (по умолчанию {DEFAULT_ADAPTIVE_MIN_INTERVAL:g}): ").strip()
+                max_input = input(f"Максимальный интервал, с (по умолчанию {DEFAULT_ADAPTIVE_MAX_INTERVAL:g}): ").strip()
+                interval = float(min_input) if min_input else DEFAULT_ADAPTIVE_MIN_INTERVAL
+                max_interval = float(max_input) if max_input else DEFAULT_ADAPTIVE_MAX_INTERVAL
+            else:
+                interval = float(interval_input) if interval_input else 1.0
+                max_interval = None
+            # Проверяем интервал сразу, до начала теста
+            make_sampler({'interval': interval, 'adaptive': adaptive, 'max_interval': max_interval})
+        except ValueError as e:
+            print(f"Недопустимый интервал: {e}")
+            continue
+        return interval, adaptive, max_interval
+
+def ask_test_params():
+    """Запрашивает параметры теста для одной нагрузки"""
     print("Введите параметры тестируемой батареи:")
     battery_name = input("Имя батареи (например, quallion ql0200i-a): ").strip()
     battery_capacity = input("Заявленная ёмкость, mAh: ").strip()
     vstop_input = input("Vstop, В (по умолчанию 2.5): ").strip()
     cc_input = input("Ток разряда, A (по умолчанию 0.050): ").strip()
+    interval, adaptive, max_interval = ask_interval()
+    binary_log = input("Формат журнала csv/bin (по умолчанию csv): ").strip().lower() == 'bin'
+    deadband = input("Записывать только изменения показаний (y/n, по умолчанию n): ").strip().lower() == 'y'
 
     # Значения по умолчанию
-    vstop = float(vstop_input) if vstop_input else 2.5
-    cc = float(cc_input) if cc_input else 0.050
+    params = {
+        'battery_name': battery_name,
+        'battery_capacity': battery_capacity,
+        'vstop': float(vstop_input) if vstop_input else 2.5,
+        'cc': float(cc_input) if cc_input else 0.050,
+        'interval': interval,
+        'adaptive': adaptive,
+        'binary_log': binary_log,
+        'deadband': DEFAULT_DEADBAND if deadband else None,
+    }
+    if adaptive:
+        params['max_interval'] = max_interval
 
     # Формируем имя файла для логов
     now_str = datetime.now().strftime('%Y%m%d_%H%M%S')
-    log_filename = f"{battery_name.replace(' ', '_')}_{battery_capacity}mAh_test_{now_str}.csv"
-    print(f"Данные будут записываться в файл: {log_filename}")
-    
-    try:
-        inst = DL3000(device['resource'])
-        console = ConsoleUpdater()
+    log_ext = BINLOG_EXT if binary_log else '.csv'
+    params['log_filename'] = f"{battery_name.replace(' ', '_')}_{battery_capacity}mAh_test_{now_str}{log_ext}"
+    return params
+
+def open_log_writer(params, device):
+    """Открывает писатель журнала в выбранном формате, при заданных порогах - через DeadbandFilter"""
+    if params['binary_log']:
+        writer = BinaryLogWriter(params['log_filename'], metadata={
+            'battery_name': params['battery_name'],
+            'battery_capacity': params['battery_capacity'],
+            'vstop': params['vstop'],
+            'cc': params['cc'],
+            'interval': params['interval'],
+            'max_interval': params.get('max_interval') if params.get('adaptive') else None,
+            'deadband': params.get('deadband'),
+            'device': device['idn'],
+        })
+    else:
+        writer = CsvLogWriter(params['log_filename'])
+    if params.get('deadband'):
+        writer = DeadbandFilter(writer, params['deadband'])
+    return writer
 
+def run_discharge(inst, device, params, stop, on_sample):
+    """
+    Настраивает нагрузку и проводит тест разряда до Vstop или до stop().
+    on_sample(sample, stats) вызывается после записи каждого отсчёта,
+    stats - статистика разряда DischargeStats, обновлённая этим отсчётом.
+    Возвращает планировщик отсчётов и статистику разряда.
+    """
+    vstop = params['vstop']
+    cc = params['cc']
+    interval = params['interval']
+    sampler = make_sampler(params)
+    stats = DischargeStats(vstop)
+
+    # Сброс и настройка одним пакетом команд с ожиданием *OPC?
+    start = time.perf_counter()
+    with inst.batch():
         inst.reset()
-        logging.info("Устройство сброшено к заводским настройкам")
-        
         # Устанавливаем необходимые параметры
         inst.set_app_mode("BATTERY")
         inst.set_battery_vstop(vstop)
         inst.set_cc_current(cc)
-        logging.info(f"Режим BATTERY, Vstop={vstop} В, Icc={cc} А")
-        
-        inst.enable()
-        logging.info("Устройство включено. Нажмите любую клавишу для остановки...")
-        time.sleep(1)  # Даем устройству время на стабилизацию
-        
+    logging.info(f"[{device['resource_str']}] Устройство сброшено и настроено за {(time.perf_counter() - start) * 1000:.0f} мс")
+    period = f"{interval:g}-{params['max_interval']:g} с (адаптивный)" if params.get('adaptive') else f"{interval:g} с"
+    logging.info(f"[{device['resource_str']}] Режим BATTERY, Vstop={vstop} В, Icc={cc} А, период {period}")
+    
+    inst.enable()
+    # Ждём установления тока вместо фиксированной паузы
+    start = time.perf_counter()
+    try:
+        inst.wait_current(cc, timeout=STABILIZATION_TIMEOUT)
+        logging.info(f"[{device['resource_str']}] Нагрузка включена, ток установился за {(time.perf_counter() - start) * 1000:.0f} мс")
+    except TimeoutError:
+        logging.warning(f"[{device['resource_str']}] Нагрузка включена, ток не установился за {STABILIZATION_TIMEOUT:g} с")
+
+    # Цикл считывания параметров с фиксированным периодом
+    log_writer = open_log_writer(params, device)
+    try:
+        while sampler.wait(stop=stop):
+            # Считываем все параметры одним запросом
+            sample = inst.measure_all()
+            
+            # Записываем данные в файл
+            if params['binary_log']:
+                log_writer.write(sample._asdict())
+            else:
+                log_writer.write(make_log_row(sample, precise=interval < 1))
+            
+            sampler.update(sample)
+            stats.update(sample)
+            on_sample(sample, stats)
+            
+            if vstop >= sample.voltage:
+                break
+    finally:
+        log_writer.close()
+        if isinstance(log_writer, DeadbandFilter):
+            logging.info(f"[{device['resource_str']}] {log_writer.summary()}")
+        logging.info(f"[{device['resource_str']}] {sampler.summary()}")
+        logging.info(f"[{device['resource_str']}] {stats.summary()}")
+    
+    # Завершение работы
+    inst.disable()
+    logging.info(f"[{device['resource_str']}] Нагрузка отключена")
+    return sampler, stats
+
+def select_devices(devices):
+    """Выбор нагрузок для теста. Возвращает список выбранных устройств"""
+    if len(devices) == 1:
+        return devices
+    print("\nНайдено несколько нагрузок:")
+    for i, dev in enumerate(devices, 1):
+        print(f"  {i}. {dev['idn']} ({dev['resource_str']})")
+    while True:
+        choice = input("Номера нагрузок через запятую, 'all' - все (по умолчанию 1): ").strip().lower()
+        if not choice:
+            return devices[:1]
+        if choice == 'all':
+            return devices
+        try:
+            numbers = [int(n) for n in choice.split(',') if n.strip()]
+        except ValueError:
+            numbers = []
+        if numbers and all(1 <= n <= len(devices) for n in numbers):
+            # Повторно указанная нагрузка выбирается один раз
+            return [devices[n - 1] for n in dict.fromkeys(numbers)]
+        print(f"Введите номера от 1 до {len(devices)} через запятую или 'all'")
+
+def run_single(device, live=False):
+    """Тест на одной нагрузке с подробным выводом в консоль"""
+    print(f"\nПодключаемся к устройству: {device['idn']}")
+    params = ask_test_params()
+    print(f"Данные будут записываться в файл: {params['log_filename']}")
+    if live:
+        start_live_chart(params['log_filename'])
+    
+    try:
+        inst = DL3000(device['resource'])
+        console = ConsoleUpdater(lines=14)
+
+        logging.info("Нажмите любую клавишу для остановки...")
         # Выводим заголовки перед началом цикла
         console.update(
             "--- Текущие показания ---",
@@ -130,64 +297,15 @@ def main():
             "Время разряда: -"
         )
         
-        # Бесконечный цикл считывания параметров
         try:
-            while True:
-                if msvcrt.kbhit():
-                    break
-                
-                # Считываем все доступные параметры
-                timestamp = datetime.now().strftime('%d-%m-%Y %H:%M:%S') 
-                voltage = inst.voltage()
-                current = inst.current()
-                power = inst.power()
-                resistance = inst.resistance()
-                capacity = inst.capability()
-                watthours = inst.watthours()
-                discharging_time = inst.discharging_time()
-                
-                # Формируем данные для записи в файл
-                log_data = {
-                    'timestamp': timestamp,
-                    'voltage': voltage,
-                    'current': current,
-                    'power': power,
-                    'resistance': resistance,
-                    'capacity': capacity,
-                    'watthours': watthours,
-                    'discharging_time': discharging_time
-                }
-                
-                # Записываем данные в файл
-                log_to_file(log_filename, log_data)
-                
-                # Обновляем данные в консоли
-                console.update(
-                    "--- Текущие показания ---",
-                    f"Напряжение: {voltage:.6f} V",
-                    f"Ток: {current:.6f} A",
-                    f"Мощность: {power:.6f} W",
-                    f"Сопротивление: {resistance:.6f} Ω",
-                    f"Ёмкость: {capacity:.6f} Ah",
-                    f"Энергия: {watthours:.6f} Wh",
-                    f"Время разряда: {discharging_time}"
-                )
-                
-                if vstop >= voltage:
-                    break
-                
-                time.sleep(1)  # Интервал между измерениями
-                
+            run_discharge(inst, device, params, stop=msvcrt.kbhit,
+                          on_sample=lambda sample, stats: console.update(*format_sample(sample, stats)))
         except KeyboardInterrupt:
             pass
         
-        # Завершение работы
-        inst.disable()
-        logging.info("Нагрузка отключена")
-        
         # Предлагаем построить графики
         if input("\nПостроить графики? (y/n): ").lower() == 'y':
-            plot_battery_data(log_filename, battery_name, battery_capacity)
+            plot_battery_data(params['log_filename'], params['battery_name'], params['battery_capacity'])
             logging.info("Построены графики")
         
     except pyvisa.errors.VisaIOError as e:
@@ -216,14 +334,161 @@ def main():
                 print("\nУстройство отключено")
         except Exception:
             logging.exception("Ошибка при отключении нагрузки")
-        
-        # Закрываем соединение
+
+def discharge_worker(device, params, stop_event, status):
+    """
+    Поток сбора данных для одной нагрузки в многоканальном режиме.
+    Ошибки перехватываются здесь и не влияют на другие каналы.
+    """
+    inst = DL3000(device['resource'])
+    name = params['battery_name']
+
+    def on_sample(sample, stats):
+        status[device['resource_str']] = (
+            f"{name}: {sample.voltage:.4f} V, {sample.current:.4f} A, "
+            f"{sample.capacity:.3f} mAh, {sample.discharging_time}, "
+            f"до Vstop: {format_remaining(stats.time_to_vstop)}"
+        )
+
+    status[device['resource_str']] = f"{name}: настройка..."
+    try:
+        sampler, _ = run_discharge(inst, device, params, stop=stop_event.is_set, on_sample=on_sample)
+        status[device['resource_str']] = f"{name}: завершён, отсчётов {sampler.samples}"
+    except Exception as e:
+        status[device['resource_str']] = f"{name}: ОШИБКА - {e}"
+        logging.exception(f"[{device['resource_str']}] Ошибка канала")
+    finally:
         try:
-            if 'device' in locals() and device and 'resource' in device:
-                device['resource'].close()
-                logging.info("Соединение с устройством закрыто")
+            inst.disable()
         except Exception:
-            logging.exception("Ошибка при закрытии соединения с устройством")
+            logging.exception(f"[{device['resource_str']}] Ошибка при отключении нагрузки")
+
+def run_multi(devices, live=False):
+    """Одновременный тест на нескольких нагрузках, по потоку на прибор"""
+    jobs = []
+    for device in devices:
+        print(f"\n=== {device['idn']} ({device['resource_str']}) ===")
+        params = ask_test_params()
+        if any(params['log_filename'] == p['log_filename'] for _, p in jobs):
+            # Одинаковые имена батарей: различаем файлы по серийному номеру прибора
+            root, ext = os.path.splitext(params['log_filename'])
+            serial = device['idn'].split(',')[2].strip() if device['idn'].count(',') >= 2 else str(len(jobs) + 1)
+            params['log_filename'] = f"{root}_{serial}{ext}"
+        print(f"Данные будут записываться в файл: {params['log_filename']}")
+        jobs.append((device, params))
+    if live:
+        for _, params in jobs:
+            start_live_chart(params['log_filename'])
+
+    stop_event = threading.Event()
+    status = {}
+    threads = [
+        threading.Thread(target=discharge_worker, args=(device, params, stop_event, status),
+                         name=device['resource_str'], daemon=True)
+        for device, params in jobs
+    ]
+    for thread in threads:
+        thread.start()
+
+    logging.info("Нажмите любую клавишу для остановки всех каналов...")
+    console = ConsoleUpdater(lines=len(jobs) + 1)
+    try:
+        while any(thread.is_alive() for thread in threads):
+            if msvcrt.kbhit():
+                stop_event.set()
+            console.update(
+                "--- Текущие показания ---",
+                *(status.get(device['resource_str'], '-') for device, _ in jobs)
+            )
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        stop_event.set()
+    finally:
+        stop_event.set()
+        for thread in threads:
+            thread.join()
+    console.update("--- Итог ---", *(status.get(device['resource_str'], '-') for device, _ in jobs))
+
+    if input("\nПостроить графики? (y/n): ").lower() == 'y':
+        for device, params in jobs:
+            plot_battery_data(params['log_filename'], params['battery_name'], params['battery_capacity'])
+        logging.info("Построены графики")
+
+def main():
+    parser = argparse.ArgumentParser(description="Тестирование батарей электронной нагрузкой Rigol DL3000")
+    parser.add_argument('--rescan', action='store_true',
+                        help="игнорировать кэш инвентаризации и опросить все VISA-ресурсы")
+    parser.add_argument('--resource-classes', nargs='+', metavar='CLASS',
+                        help="опрашивать только эти классы VISA-ресурсов, например USB TCPIP "
+                             "(по умолчанию все, включая GPIB и ASRL)")
+    parser.add_argument('--live', action='store_true',
+                        help="показывать живой график во время теста")
+    parser.add_argument('--simulate', type=int, metavar='N', default=0,
+                        help="работать с N симулированными нагрузками вместо приборов")
+    parser.add_argument('--speed', type=float, default=60.0,
+                        help="ускорение времени симулированной батареи (по умолчанию 60)")
+    parser.add_argument('--trace', metavar='FILE',
+                        help="записывать статистику обмена с приборами в JSON-файл (раз в минуту и в конце)")
+    args = parser.parse_args()
+
+    cache = None
+    if args.simulate:
+        # Симулированные приборы не должны попадать в общий кэш инвентаризации
+        import tempfile
+        from LabInstruments.SimulatedDL3000 import BatteryModel, SimulatedResourceManager
+        from LabInstruments.Inventory import InventoryCache
+        rm = SimulatedResourceManager(args.simulate, model_factory=lambda: BatteryModel(speed=args.speed))
+        cache = InventoryCache(os.path.join(tempfile.gettempdir(), "dl3000_simulated_inventory.json"))
+    else:
+        rm = pyvisa.ResourceManager()
+    # Настройка логирования в файл
+    run_ts = datetime.now().strftime('%Y%m%d_%H%M%S')
+    os.makedirs(os.path.join(os.getcwd(), "logs"), exist_ok=True)
+    log_path = os.path.join(os.getcwd(), f"logs\\connect_run_{run_ts}.log")
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s [%(levelname)s] %(message)s',
+        handlers=[
+            logging.FileHandler(log_path, encoding='utf-8'),
+            logging.StreamHandler()
+        ]
+    )
+    logging.info("Старт приложения connect.py")
+    
+    print("Поиск подключенных устройств Rigol DL3000...")
+    start = time.perf_counter()
+    devices = find_dl3000_devices(rm, refresh=args.rescan, cache=cache,
+                                  resource_classes=args.resource_classes)
+    logging.info(f"Поиск устройств занял {(time.perf_counter() - start) * 1000:.0f} мс")
+    
+    if not devices:
+        print("Не найдено ни одного устройства Rigol DL3000")
+        return
+    
+    logging.info(f"Найдено устройств DL3000: {len(devices)}")
+    for i, dev in enumerate(devices, 1):
+        logging.info(f"Устройство {i}: {dev['idn']} ({dev['resource_str']})")
+
+    selected = select_devices(devices)
+    tracer = Tracer(args.trace) if args.trace else None
+    for device in selected:
+        device['resource'] = trace(device['resource'], tracer)
+    try:
+        if len(selected) == 1:
+            run_single(selected[0], live=args.live)
+        else:
+            run_multi(selected, live=args.live)
+    finally:
+        if tracer is not None:
+            tracer.dump()
+            logging.info(f"Статистика обмена с приборами ({args.trace}):\n{tracer.report()}")
+        # Закрываем соединения
+        for device in devices:
+            try:
+                device['resource'].close()
+                logging.info(f"Соединение с устройством {device['resource_str']} закрыто")
+            except Exception:
+                logging.exception("Ошибка при закрытии соединения с устройством")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,201 @@
+"""
+Живой график идущего теста.
+
+Следит за растущим журналом (CSV или двоичным) и на каждом обновлении читает
+только байты, дописанные с прошлого раза. Новые точки добавляются к уже
+построенным линиям; история хранится в буфере ограниченного размера, который
+прореживается min/max при заполнении, поэтому стоимость обновления не растёт
+с длительностью теста.
+
+Запуск:
+    python live_chart.py <журнал.csv | журнал.dlb> [--interval 2]
+"""
+import argparse
+import csv
+import io
+import os
+import queue
+from datetime import datetime
+
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+
+from binlog import BINLOG_EXT, TIMESTAMP_FORMATS, read_header
+
+# Колонки на графиках: (имя колонки, подпись оси, цвет) - как в charts.plot_battery_data
+PLOTS = [
+    ('voltage', 'Напряжение, В', 'red'),
+    ('power', 'Мощность, Вт', 'green'),
+    ('capacity', 'Ёмкость, мА·ч', 'purple'),
+    ('watthours', 'Энергия, Вт·ч', 'blue'),
+    ('resistance', 'Сопротивление, Ом', 'orange'),
+]
+COLUMNS = [column for column, _, _ in PLOTS]
+
+# Максимальное число точек одной линии на экране
+MAX_POINTS = 4000
+
+def _parse_time(value):
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return mdates.date2num(datetime.strptime(value, fmt))
+        except ValueError:
+            continue
+    raise ValueError(f"Неизвестный формат метки времени: {value}")
+
+class CsvTail:
+    """
+    Чтение только новых полных строк растущего CSV-журнала.
+    Смещение запоминается после последнего перевода строки,
+    недописанная строка будет прочитана при следующем вызове.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.offset = 0
+        self.fieldnames = None
+
+    def read_new(self):
+        """Возвращает (время в днях matplotlib, {колонка: массив}) для новых строк"""
+        if not os.path.isfile(self.filename):
+            return np.empty(0), {c: np.empty(0) for c in COLUMNS}
+        with open(self.filename, 'rb') as f:
+            f.seek(self.offset)
+            chunk = f.read()
+        end = chunk.rfind(b'\n') + 1
+        self.offset += end
+        lines = chunk[:end].decode('utf-8').splitlines()
+        if self.fieldnames is None and lines:
+            self.fieldnames = next(csv.reader([lines[0]]))
+            lines = lines[1:]
+        rows = list(csv.DictReader(io.StringIO('\n'.join(lines)), fieldnames=self.fieldnames)) if lines else []
+        times = np.array([_parse_time(row['timestamp']) for row in rows])
+        return times, {c: np.array([float(row[c]) for row in rows]) for c in COLUMNS}
+
+class BinlogTail:
+    """Чтение только новых полных записей растущего двоичного журнала"""
+    def __init__(self, filename):
+        self.filename = filename
+        self.offset = None
+        self.dtype = None
+
+    def read_new(self):
+        if not os.path.isfile(self.filename) or os.path.getsize(self.filename) == 0:
+            return np.empty(0), {c: np.empty(0) for c in COLUMNS}
+        with open(self.filename, 'rb') as f:
+            if self.offset is None:
+                meta, self.offset = read_header(f)
+                self.dtype = np.dtype([('timestamp', '<i8')] + [(c, '<f8') for c in meta['columns']])
+            f.seek(self.offset)
+            chunk = f.read()
+        chunk = chunk[:len(chunk) - len(chunk) % self.dtype.itemsize]
+        self.offset += len(chunk)
+        records = np.frombuffer(chunk, dtype=self.dtype)
+        # Локальные наносекунды от 1970-01-01 -> дни matplotlib
+        times = records['timestamp'].astype('datetime64[ns]').astype('datetime64[us]')
+        return mdates.date2num(times), {c: records[c].astype(float) for c in COLUMNS}
+
+class QueueFeed:
+    """Источник точек из очереди DL3000Sample внутри процесса сбора данных"""
+    def __init__(self, sample_queue):
+        self.queue = sample_queue
+
+    def read_new(self):
+        samples = []
+        while True:
+            try:
+                samples.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        times = mdates.date2num([datetime.fromtimestamp(s.timestamp) for s in samples]) if samples else np.empty(0)
+        return np.asarray(times, dtype=float), {c: np.array([getattr(s, c) for s in samples], dtype=float) for c in COLUMNS}
+
+class DecimatingSeries:
+    """
+    Буфер точек линии фиксированной ёмкости.
+    При заполнении вдвое сжимается: из каждых четырёх точек остаются минимум и максимум,
+    поэтому объём хранимых и отрисовываемых данных ограничен max_points.
+    """
+    def __init__(self, max_points=MAX_POINTS):
+        self.max_points = max(max_points - max_points % 4, 16)
+        self.x = np.empty(self.max_points)
+        self.y = np.empty(self.max_points)
+        self.n = 0
+
+    def _compact(self):
+        n = self.n - self.n % 4
+        x = self.x[:n].reshape(-1, 4)
+        y = self.y[:n].reshape(-1, 4)
+        rows = np.arange(len(y))
+        i_min = y.argmin(axis=1)
+        i_max = y.argmax(axis=1)
+        first = np.minimum(i_min, i_max)
+        second = np.maximum(i_min, i_max)
+        tail_x = self.x[n:self.n].copy()
+        tail_y = self.y[n:self.n].copy()
+        m = len(rows) * 2
+        self.x[:m:2], self.x[1:m:2] = x[rows, first], x[rows, second]
+        self.y[:m:2], self.y[1:m:2] = y[rows, first], y[rows, second]
+        self.x[m:m + len(tail_x)] = tail_x
+        self.y[m:m + len(tail_y)] = tail_y
+        self.n = m + len(tail_x)
+
+    def extend(self, x, y):
+        # Порциями по четверти ёмкости: после одного сжатия порция всегда помещается
+        step = self.max_points // 4
+        for start in range(0, len(x), step):
+            part_x = x[start:start + step]
+            part_y = y[start:start + step]
+            if self.n + len(part_x) > self.max_points:
+                self._compact()
+            self.x[self.n:self.n + len(part_x)] = part_x
+            self.y[self.n:self.n + len(part_y)] = part_y
+            self.n += len(part_x)
+
+class LiveChart:
+    """Окно matplotlib с пятью графиками, обновляемое новыми точками источника"""
+    def __init__(self, source, title=None, max_points=MAX_POINTS):
+        self.source = source
+        self.fig, self.axes = plt.subplots(len(PLOTS), 1, sharex=True, figsize=(10, 12))
+        self.fig.suptitle(title or "Живой график теста")
+        self.series = {}
+        self.lines = {}
+        for ax, (column, label, color) in zip(self.axes, PLOTS):
+            self.series[column] = DecimatingSeries(max_points)
+            self.lines[column], = ax.plot([], [], color=color, drawstyle='steps-post')
+            ax.set_ylabel(label)
+            ax.grid(True)
+        self.axes[-1].xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
+        self.samples = 0
+
+    def refresh(self):
+        """Добавляет новые точки. Возвращает их количество"""
+        times, values = self.source.read_new()
+        if len(times) == 0:
+            return 0
+        self.samples += len(times)
+        for ax, (column, _, _) in zip(self.axes, PLOTS):
+            series = self.series[column]
+            series.extend(times, values[column])
+            self.lines[column].set_data(series.x[:series.n], series.y[:series.n])
+            ax.relim()
+            ax.autoscale_view()
+        self.fig.canvas.draw_idle()
+        return len(times)
+
+    def run(self, interval=2.0):
+        plt.show(block=False)
+        while plt.fignum_exists(self.fig.number):
+            self.refresh()
+            plt.pause(interval)
+
+def open_source(filename):
+    return BinlogTail(filename) if filename.lower().endswith(BINLOG_EXT) else CsvTail(filename)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Живой график растущего журнала теста")
+    parser.add_argument('filename', help="CSV или двоичный журнал connect.py")
+    parser.add_argument('--interval', type=float, default=2.0, help="период обновления, с")
+    args = parser.parse_args()
+    LiveChart(open_source(args.filename), title=os.path.basename(args.filename)).run(args.interval)
@@ -0,0 +1,213 @@
+import csv
+import os
+import time
+
+class BufferedLogWriter:
+    """
+    Основа долгоживущих буферизованных писателей журнала (CSV и двоичного).
+
+    Держит один открытый файл на всё время теста. Строки копятся в буфере
+    файла и сбрасываются на диск каждые flush_rows строк или flush_interval
+    секунд (что наступит раньше), os.fsync выполняется не чаще раза
+    в fsync_interval секунд.
+
+    Ротация (по умолчанию выключена): при превышении rotate_bytes байт или
+    rotate_interval секунд запись продолжается в файл <имя>_partNNN<расширение>.
+
+    Наследники определяют _open_file(filename) - открыть (или восстановить
+    после сбоя) файл и вернуть его - и _write_row(data) - записать строку.
+    """
+    def __init__(self, filename, flush_rows=50, flush_interval=5.0, fsync_interval=60.0,
+                 rotate_bytes=None, rotate_interval=None, clock=time.monotonic):
+        self.base_filename = filename
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.rotate_bytes = rotate_bytes
+        self.rotate_interval = rotate_interval
+        self._clock = clock
+        self.files = []          # все файлы, в которые велась запись
+        self.rows = 0            # всего записано строк
+        self._file = None
+        self._open(filename)
+
+    @property
+    def filename(self):
+        return self.files[-1]
+
+    def _open_file(self, filename):
+        raise NotImplementedError
+
+    def _write_row(self, data):
+        raise NotImplementedError
+
+    def _open(self, filename):
+        self._file = self._open_file(filename)
+        self.files.append(filename)
+        now = self._clock()
+        self._opened_at = now
+        self._last_flush = now
+        self._last_fsync = now
+        self._pending = 0
+
+    def _rotate(self):
+        self.flush(fsync=True)
+        self._file.close()
+        root, ext = os.path.splitext(self.base_filename)
+        self._open(f"{root}_part{len(self.files):03d}{ext}")
+
+    def write(self, data):
+        """Записывает строку (dict) в журнал, аналог log_to_file(filename, data)"""
+        self._write_row(data)
+        self.rows += 1
+        self._pending += 1
+
+        now = self._clock()
+        if self._pending >= self.flush_rows or now - self._last_flush >= self.flush_interval:
+            self.flush(fsync=now - self._last_fsync >= self.fsync_interval)
+            if self.rotate_bytes is not None and self._file.tell() >= self.rotate_bytes:
+                self._rotate()
+        if self.rotate_interval is not None and now - self._opened_at >= self.rotate_interval:
+            self._rotate()
+
+    def flush(self, fsync=False):
+        """Сбрасывает буфер в файл, при fsync=True - и на диск"""
+        self._file.flush()
+        now = self._clock()
+        self._last_flush = now
+        self._pending = 0
+        if fsync:
+            os.fsync(self._file.fileno())
+            self._last_fsync = now
+
+    def close(self):
+        if self._file is not None and not self._file.closed:
+            self.flush(fsync=True)
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class CsvLogWriter(BufferedLogWriter):
+    """
+    Буферизованный писатель CSV-журнала (см. BufferedLogWriter).
+
+    Один csv.DictWriter на файл. При открытии существующего файла
+    недописанная последняя строка (после аварийного завершения) отрезается,
+    заголовок повторно не пишется. Каждый файл ротации - со своим заголовком.
+    """
+    _fieldnames = None  # колонки по первой строке, общие для всех файлов ротации
+
+    @staticmethod
+    def _recover(filename):
+        """
+        Отрезает недописанную последнюю строку.
+        Возвращает True, если в файле остались полные строки (есть заголовок).
+        """
+        if not os.path.isfile(filename):
+            return False
+        with open(filename, 'rb+') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return False
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return True
+            # Ищем последний перевод строки с конца файла блоками
+            pos = size
+            while pos > 0:
+                step = min(4096, pos)
+                pos -= step
+                f.seek(pos)
+                idx = f.read(step).rfind(b'\n')
+                if idx >= 0:
+                    f.truncate(pos + idx + 1)
+                    return True
+            f.truncate(0)
+            return False
+
+    def _open_file(self, filename):
+        self._has_header = self._recover(filename)
+        self._writer = None
+        return open(filename, 'a', newline='', buffering=1 << 16)
+
+    def _write_row(self, data):
+        if self._writer is None:
+            if self._fieldnames is None:
+                self._fieldnames = list(data.keys())
+            self._writer = csv.DictWriter(self._file, fieldnames=self._fieldnames)
+            if not self._has_header:
+                self._writer.writeheader()
+        self._writer.writerow(data)
+
+# Пороги изменения по колонкам для записи только изменений (CC-разряд)
+DEFAULT_DEADBAND = {
+    'voltage': 0.001,     # В
+    'current': 0.001,     # А
+    'power': 0.005,       # Вт
+    'resistance': 0.05,   # Ом
+}
+
+class DeadbandFilter:
+    """
+    Фильтр строк перед писателем журнала (CsvLogWriter или BinaryLogWriter).
+
+    Строка записывается, только если значение хотя бы одной колонки из
+    thresholds ({колонка: порог}) отличается от последнего записанного
+    не меньше чем на порог. Первая и последняя строки записываются всегда,
+    остальные колонки (метка времени, ёмкость и т.д.) на решение не влияют.
+    Между записанными строками значения считаются постоянными, поэтому такой
+    журнал нужно строить ступенчатыми линиями.
+    """
+    def __init__(self, writer, thresholds=DEFAULT_DEADBAND):
+        self.writer = writer
+        self.thresholds = dict(thresholds)
+        self.rows_in = 0          # строк на входе
+        self.rows_out = 0         # строк записано
+        self._last_written = None
+        self._held = None         # последняя отброшенная строка
+
+    def __getattr__(self, name):
+        return getattr(self.writer, name)
+
+    def _changed(self, data):
+        last = self._last_written
+        return any(abs(data[column] - last[column]) >= threshold
+                   for column, threshold in self.thresholds.items())
+
+    def _write(self, data):
+        self.writer.write(data)
+        self._last_written = data
+        self._held = None
+        self.rows_out += 1
+
+    def write(self, data):
+        self.rows_in += 1
+        if self._last_written is None or self._changed(data):
+            self._write(data)
+        else:
+            self._held = data
+
+    @property
+    def ratio(self):
+        """Степень сжатия: строк на входе на одну записанную"""
+        return self.rows_in / self.rows_out if self.rows_out else 1.0
+
+    def summary(self):
+        return (f"Запись изменений: записано {self.rows_out} из {self.rows_in} строк "
+                f"(сжатие {self.ratio:.1f}:1)")
+
+    def close(self):
+        if self._held is not None:
+            # Последняя строка нужна, чтобы журнал доходил до конца теста
+            self._write(self._held)
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -1,20 +1,22 @@
+import argparse
 import pyvisa
-from pyvisa.resources import MessageBasedResource
+from LabInstruments.Tracing import Tracer, trace
 
-class VisaLogger(MessageBasedResource):
-    def write(self, command):
-        print(f"[SENT] {command.strip()}")
-        super().write(command)
-
-    def query(self, command):
-        print(f"[SENT] {command.strip()}")
-        response = super().query(command)
-        print(f"[RECV] {response.strip()}")
-        return response
+parser = argparse.ArgumentParser(description="Трассировка обмена с прибором по SCPI")
+parser.add_argument('resource', nargs='?', default='USB0::6833::3601::DL3A204100212::0::INSTR',
+                    help="VISA-ресурс прибора")
+parser.add_argument('--trace', metavar='FILE', help="записать статистику трассировки в JSON-файл")
+parser.add_argument('--quiet', action='store_true', help="не печатать каждую команду")
+args = parser.parse_args()
 
+tracer = Tracer(args.trace, log=None if args.quiet else print)
 rm = pyvisa.ResourceManager()
-resource = rm.open_resource('USB0::6833::3601::DL3A204100212::0::INSTR')
-instrument = VisaLogger(resource._resource)
+instrument = trace(rm.open_resource(args.resource), tracer)
 
 instrument.write(":APPL:BATT")
-print(instrument.query("*IDN?"))
\ No newline at end of file
+print(instrument.query("*IDN?"))
+
+print(tracer.report())
+if args.trace:
+    tracer.dump()
+instrument.close()
@@ -0,0 +1,132 @@
+"""
+Статистика разряда, обновляемая на каждом отсчёте за O(1) без хранения истории.
+
+Среднее, минимум и максимум считаются по алгоритму Уэлфорда, dV/dt
+сглаживается экспоненциально с постоянной времени, не зависящей от периода
+отсчётов. По сглаженным dV/dt и скорости набора ёмкости оценивается время
+до Vstop и ёмкость, которая будет отдана к этому моменту.
+"""
+import math
+from datetime import timedelta
+
+# Постоянная времени сглаживания dV/dt и скорости набора ёмкости, с
+DEFAULT_SMOOTHING_TIME = 60.0
+# Наклон, ниже которого напряжение считается постоянным, В/с
+MIN_DVDT = 1e-9
+# Предел оценки времени до Vstop, с; более далёкие оценки не показываются
+MAX_TIME_TO_VSTOP = 100 * 3600
+
+def format_remaining(seconds):
+    """Оценка времени для вывода: ч:мм:сс или '—', если оценки нет"""
+    return str(timedelta(seconds=round(seconds))) if seconds is not None else "—"
+
+class RunningStats:
+    """Среднее, дисперсия, минимум и максимум потока значений (алгоритм Уэлфорда)"""
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    @property
+    def std(self):
+        return math.sqrt(self._m2 / (self.count - 1)) if self.count > 1 else 0.0
+
+    def __str__(self):
+        if not self.count:
+            return "-"
+        return f"ср. {self.mean:.6f} (мин. {self.min:.6f}, макс. {self.max:.6f})"
+
+class EmaRate:
+    """
+    Экспоненциально сглаженная производная величины по времени.
+    Вес нового отсчёта 1 - exp(-dt / tau), поэтому сглаживание
+    одинаково при любом (в т.ч. неравномерном) периоде отсчётов.
+    """
+    def __init__(self, smoothing_time=DEFAULT_SMOOTHING_TIME):
+        self.smoothing_time = smoothing_time
+        self.value = None
+        self._last = None
+
+    def add(self, t, y):
+        if self._last is not None:
+            last_t, last_y = self._last
+            dt = t - last_t
+            if dt > 0:
+                rate = (y - last_y) / dt
+                if self.value is None:
+                    self.value = rate
+                else:
+                    self.value += (1 - math.exp(-dt / self.smoothing_time)) * (rate - self.value)
+        self._last = (t, y)
+
+class DischargeStats:
+    """
+    Текущая статистика теста разряда по отсчётам DL3000Sample.
+    vstop - напряжение окончания теста, В.
+    """
+    def __init__(self, vstop, smoothing_time=DEFAULT_SMOOTHING_TIME):
+        self.vstop = vstop
+        self.voltage = RunningStats()
+        self.current = RunningStats()
+        self.resistance = RunningStats()
+        self.dvdt = EmaRate(smoothing_time)
+        self.capacity_rate = EmaRate(smoothing_time)
+        self.last = None
+
+    def update(self, sample):
+        self.voltage.add(sample.voltage)
+        self.current.add(sample.current)
+        self.resistance.add(sample.resistance)
+        self.dvdt.add(sample.timestamp, sample.voltage)
+        self.capacity_rate.add(sample.timestamp, sample.capacity)
+        self.last = sample
+
+    @property
+    def time_to_vstop(self):
+        """
+        Оценка времени до Vstop, с, или None, пока напряжение заметно не падает
+        или оценка больше MAX_TIME_TO_VSTOP (например, на плато разряда)
+        """
+        dvdt = self.dvdt.value
+        if self.last is None or dvdt is None or dvdt > -MIN_DVDT:
+            return None
+        remaining = max(self.last.voltage - self.vstop, 0.0) / -dvdt
+        return remaining if remaining <= MAX_TIME_TO_VSTOP else None
+
+    @property
+    def capacity_at_vstop(self):
+        """Оценка ёмкости к моменту Vstop (в единицах прибора) или None"""
+        remaining = self.time_to_vstop
+        if remaining is None or self.capacity_rate.value is None:
+            return None
+        return self.last.capacity + self.capacity_rate.value * remaining
+
+    def lines(self):
+        """Строки консоли со статистикой"""
+        dvdt = self.dvdt.value
+        remaining = self.time_to_vstop
+        capacity = self.capacity_at_vstop
+        return (
+            f"Напряжение: {self.voltage}",
+            f"Ток: {self.current}",
+            f"Сопротивление: {self.resistance}",
+            f"dV/dt: {dvdt * 60000:.3f} мВ/мин" if dvdt is not None else "dV/dt: -",
+            "До Vstop: " + (
+                f"{format_remaining(remaining)}, ёмкость {capacity:.6f} Ah"
+                if remaining is not None and capacity is not None else format_remaining(None)
+            ),
+        )
+
+    def summary(self):
+        """Строка со статистикой для журнала"""
+        return "Статистика: " + "; ".join(self.lines())
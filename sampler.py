@@ -0,0 +1,174 @@
+import time
+
+# Допустимый диапазон периода отсчётов, с (10 Гц ... 1 раз в минуту)
+MIN_INTERVAL = 0.1
+MAX_INTERVAL = 60.0
+
+# Шаг опроса условия остановки во время ожидания, с
+STOP_POLL_INTERVAL = 0.05
+
+class FixedRateSampler:
+    """
+    Планировщик отсчётов с фиксированным периодом без накопления дрейфа.
+
+    Моменты отсчётов отсчитываются от общего начала (start + n * interval),
+    поэтому время запросов к прибору и записи в файл не сдвигает шкалу.
+    Если цикл опоздал больше чем на период, пропущенные такты не догоняются
+    пачкой, а пропускаются и учитываются в счётчиках.
+    """
+    def __init__(self, interval=1.0, clock=time.monotonic, sleep=time.sleep):
+        if not MIN_INTERVAL <= interval <= MAX_INTERVAL:
+            raise ValueError(f"Интервал должен быть от {MIN_INTERVAL} до {MAX_INTERVAL} с, задано {interval}")
+        self.interval = interval
+        self._clock = clock
+        self._sleep = sleep
+        self.start = None
+        self.last_deadline = None
+        self.tick = 0             # номер следующего такта
+        self.samples = 0          # выполнено отсчётов
+        self.overruns = 0         # сколько раз цикл не уложился в период
+        self.skipped = 0          # пропущено тактов
+        self.last_jitter = 0.0    # опоздание последнего отсчёта, с
+        self.max_jitter = 0.0
+        self._jitter_sum = 0.0
+
+    @property
+    def mean_jitter(self):
+        return self._jitter_sum / self.samples if self.samples else 0.0
+
+    def _deadline(self, tick):
+        return self.start + tick * self.interval
+
+    def _next_deadline(self, now):
+        deadline = self._deadline(self.tick)
+        if now > deadline:
+            # Берём последний уже наступивший такт, остальные пропускаем
+            due = int((now - self.start) // self.interval)
+            if due > self.tick:
+                self.overruns += 1
+                self.skipped += due - self.tick
+                self.tick = due
+                deadline = self._deadline(due)
+        return deadline
+
+    def wait(self, stop=None):
+        """
+        Ждёт наступления следующего такта.
+        stop - необязательная функция без аргументов, опрашивается во время ожидания.
+        Возвращает False, если ожидание прервано по stop(), иначе True.
+        """
+        now = self._clock()
+        if self.start is None:
+            self.start = now
+
+        deadline = self._next_deadline(now)
+
+        while True:
+            if stop is not None and stop():
+                return False
+            remaining = deadline - self._clock()
+            if remaining <= 0:
+                break
+            self._sleep(min(remaining, STOP_POLL_INTERVAL) if stop is not None else remaining)
+
+        jitter = self._clock() - deadline
+        self.last_jitter = jitter
+        self.max_jitter = max(self.max_jitter, jitter)
+        self._jitter_sum += jitter
+        self.samples += 1
+        self.tick += 1
+        self.last_deadline = deadline
+        return True
+
+    def update(self, sample):
+        """Отсчёт DL3000Sample после такта. Фиксированный период от него не зависит"""
+
+    def summary(self):
+        """Строка со статистикой планировщика для журнала"""
+        return (
+            f"Период {self.interval:g} с, отсчётов: {self.samples}, "
+            f"перегрузок: {self.overruns}, пропущено тактов: {self.skipped}, "
+            f"джиттер ср./макс.: {self.mean_jitter * 1000:.1f}/{self.max_jitter * 1000:.1f} мс"
+        )
+
+
+# Параметры адаптивного режима по умолчанию
+DEFAULT_ADAPTIVE_MIN_INTERVAL = 0.2
+DEFAULT_ADAPTIVE_MAX_INTERVAL = 10.0
+# |dV/dt|, В/с, при котором период равен максимальному; при большей скорости период уменьшается пропорционально
+DEFAULT_DVDT_THRESHOLD = 0.0002
+# Изменение тока между отсчётами, А, при котором включается минимальный период
+DEFAULT_RIPPLE_THRESHOLD = 0.005
+# Время после старта с минимальным периодом (переходный процесс после enable()), с
+DEFAULT_SETTLE_TIME = 30.0
+# Во сколько раз период может вырасти за один отсчёт (уменьшается сразу)
+MAX_INTERVAL_GROWTH = 1.5
+
+class AdaptiveSampler(FixedRateSampler):
+    """
+    Планировщик отсчётов с периодом, зависящим от динамики разряда.
+
+    После каждого отсчёта update(sample) пересчитывает период:
+    - первые settle_time секунд, а также при изменении тока между отсчётами
+      больше ripple_threshold - минимальный период;
+    - иначе период обратно пропорционален |dV/dt|: при dvdt_threshold
+      и медленнее - максимальный, при вдесятеро большей скорости - вдесятеро меньше.
+    Период уменьшается сразу, а растёт не более чем в MAX_INTERVAL_GROWTH раз
+    за отсчёт, и всегда остаётся в пределах [min_interval, max_interval].
+    Следующий отсчёт назначается от момента предыдущего, опоздание больше
+    периода учитывается как перегрузка.
+    """
+    def __init__(self, min_interval=DEFAULT_ADAPTIVE_MIN_INTERVAL, max_interval=DEFAULT_ADAPTIVE_MAX_INTERVAL,
+                 dvdt_threshold=DEFAULT_DVDT_THRESHOLD, ripple_threshold=DEFAULT_RIPPLE_THRESHOLD,
+                 settle_time=DEFAULT_SETTLE_TIME, clock=time.monotonic, sleep=time.sleep):
+        if not MIN_INTERVAL <= min_interval <= max_interval <= MAX_INTERVAL:
+            raise ValueError(
+                f"Нужно {MIN_INTERVAL} <= минимальный <= максимальный <= {MAX_INTERVAL} с, "
+                f"задано {min_interval} и {max_interval}"
+            )
+        super().__init__(min_interval, clock=clock, sleep=sleep)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.dvdt_threshold = dvdt_threshold
+        self.ripple_threshold = ripple_threshold
+        self.settle_time = settle_time
+        self._last_sample = None
+
+    def _next_deadline(self, now):
+        if self.last_deadline is None:
+            return now
+        deadline = self.last_deadline + self.interval
+        if now - deadline > self.interval:
+            self.overruns += 1
+            self.skipped += int((now - deadline) // self.interval)
+            deadline = now
+        return deadline
+
+    def _target_interval(self, sample):
+        last = self._last_sample
+        if last is None or self.last_deadline - self.start < self.settle_time:
+            return self.min_interval
+        if abs(sample.current - last.current) > self.ripple_threshold:
+            return self.min_interval
+        dt = sample.timestamp - last.timestamp
+        if dt <= 0:
+            return self.interval
+        dvdt = abs(sample.voltage - last.voltage) / dt
+        if dvdt <= self.dvdt_threshold:
+            return self.max_interval
+        return self.max_interval * self.dvdt_threshold / dvdt
+
+    def update(self, sample):
+        """Пересчитывает период по новому отсчёту DL3000Sample"""
+        target = self._target_interval(sample)
+        self.interval = max(self.min_interval, min(target, self.interval * MAX_INTERVAL_GROWTH, self.max_interval))
+        self._last_sample = sample
+
+    def summary(self):
+        mean_interval = (self.last_deadline - self.start) / (self.samples - 1) if self.samples > 1 else self.interval
+        return (
+            f"Адаптивный период {self.min_interval:g}-{self.max_interval:g} с "
+            f"(средний {mean_interval:.2f} с), отсчётов: {self.samples}, "
+            f"перегрузок: {self.overruns}, пропущено тактов: {self.skipped}, "
+            f"джиттер ср./макс.: {self.mean_jitter * 1000:.1f}/{self.max_jitter * 1000:.1f} мс"
+        )
@@ -0,0 +1,52 @@
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+pytest.importorskip("numpy")
+from binlog import BinaryLogWriter, binlog_to_csv, csv_to_binlog, read_binlog
+
+HEADER = ['timestamp', 'voltage', 'current', 'power', 'resistance', 'capacity', 'watthours', 'discharging_time']
+
+def write_csv(filename, precise=False):
+    with open(filename, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        for i in range(5):
+            timestamp = f'18-10-2026 10:00:{i:02d}' + ('.250' if precise else '')
+            writer.writerow([timestamp, 4.0 - i * 0.001, 0.05, 0.2, 80.0, i * 0.1, 0.0, f'0:0:{i}'])
+
+def read_csv(filename):
+    with open(filename, newline='') as f:
+        return list(csv.reader(f))
+
+@pytest.mark.parametrize("precise", [False, True])
+def test_csv_round_trip(tmp_path, precise):
+    source = str(tmp_path / 'log.csv')
+    write_csv(source, precise)
+    binary = csv_to_binlog(source, str(tmp_path / 'log.dlb'), metadata={'battery_name': 'test'})
+    meta, records = read_binlog(binary)
+    assert meta['battery_name'] == 'test'
+    assert len(records) == 5
+    restored = binlog_to_csv(binary, str(tmp_path / 'restored.csv'))
+    original, result = read_csv(source), read_csv(restored)
+    assert result[0] == original[0]
+    for row, expected in zip(result[1:], original[1:]):
+        assert row[0] == expected[0]
+        assert [float(v) for v in row[1:-1]] == [float(v) for v in expected[1:-1]]
+        assert row[-1] == expected[-1]
+
+def test_append_drops_partial_record(tmp_path):
+    source = str(tmp_path / 'log.csv')
+    write_csv(source)
+    binary = csv_to_binlog(source, str(tmp_path / 'log.dlb'))
+    with open(binary, 'ab') as f:
+        f.write(b'\x00' * 7)  # сбой посреди записи
+    with BinaryLogWriter(binary) as writer:
+        writer.write({'timestamp': 1.8e9, 'voltage': 3.9, 'current': 0.05, 'power': 0.2,
+                      'resistance': 78.0, 'capacity': 1.0, 'watthours': 0.0, 'discharging_time': 60})
+    _, records = read_binlog(binary)
+    assert len(records) == 6
+    assert records['voltage'][-1] == 3.9
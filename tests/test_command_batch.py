@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from LabInstruments.CommandBatch import BatchedResource
+
+class FakeResource(object):
+    def __init__(self, reply="1\n"):
+        self.reply = reply
+        self.messages = []
+        self.timeout = 2000
+
+    def write(self, message):
+        self.messages.append(message)
+
+    def query(self, message):
+        self.messages.append(message)
+        return self.reply
+
+def test_messages_respect_max_length():
+    batched = BatchedResource(FakeResource(), max_message_length=20)
+    commands = [":A 1", ":BB 22", ":CCC 333", ":DDDD 4444", ":E"]
+    messages = batched._messages(commands)
+    assert all(len(message) <= 20 for message in messages)
+    assert ";".join(messages).split(";") == commands
+
+def test_long_command_gets_its_own_message():
+    batched = BatchedResource(FakeResource(), max_message_length=10)
+    assert batched._messages([":A", ":VERY:LONG:COMMAND 1", ":B"]) == [":A", ":VERY:LONG:COMMAND 1", ":B"]
+
+def test_flush_sends_queue_with_opc():
+    inst = FakeResource("+1\n")
+    batched = BatchedResource(inst)
+    batched.write("*RST")
+    batched.write("SOURCE:CURRENT:LEV:IMM 0.5")
+    assert inst.messages == []
+    assert batched.flush()
+    assert inst.messages == ["*RST;:SOURCE:CURRENT:LEV:IMM 0.5;*OPC?"]
+
+def test_flush_raises_if_not_confirmed():
+    batched = BatchedResource(FakeResource("0\n"))
+    batched.write(":A 1")
+    with pytest.raises(ValueError):
+        batched.flush()
+
+def test_attribute_writes_reach_the_resource():
+    inst = FakeResource()
+    batched = BatchedResource(inst)
+    batched.timeout = 5000
+    assert inst.timeout == 5000
+    batched.write(":A 1")
+    assert batched.queue == [":A 1"]
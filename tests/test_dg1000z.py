@@ -0,0 +1,54 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+pytest.importorskip("UliEngineering")
+from LabInstruments.DG1000Z import DG1000Z
+
+class FakeResource(object):
+    def __init__(self):
+        self.messages = []
+
+    def write(self, message):
+        self.messages.append(message)
+
+    def write_binary_values(self, message, values, datatype="f", is_big_endian=False):
+        self.messages.append(message)
+
+def uploads(inst):
+    return sum(":TRACE:DATA:DAC16" in message for message in inst.messages)
+
+def test_identical_upload_is_skipped():
+    inst = FakeResource()
+    dg = DG1000Z(inst)
+    waveform = np.sin(np.linspace(0, 2 * np.pi, 1000))
+    assert dg.upload_volatile_waveform(1, waveform)
+    assert not dg.upload_volatile_waveform(1, waveform)
+    assert uploads(inst) == 1
+
+@pytest.mark.parametrize("switch", [
+    lambda dg: dg.set_channel_waveform(1, "SIN"),
+    lambda dg: dg.set_channel_dc(1, "1.0V"),
+    lambda dg: dg.set_volatile_waveform(1, [0.0, 1.0]),
+])
+def test_upload_after_switching_waveform(switch):
+    inst = FakeResource()
+    dg = DG1000Z(inst)
+    waveform = np.sin(np.linspace(0, 2 * np.pi, 1000))
+    dg.upload_volatile_waveform(1, waveform)
+    switch(dg)
+    assert dg.upload_volatile_waveform(1, waveform)
+    assert uploads(inst) == 2
+
+def test_other_channel_keeps_its_cache():
+    inst = FakeResource()
+    dg = DG1000Z(inst)
+    waveform = np.linspace(-1, 1, 100)
+    dg.upload_volatile_waveform(1, waveform)
+    dg.upload_volatile_waveform(2, waveform)
+    dg.set_channel_waveform(2, "SQU")
+    assert not dg.upload_volatile_waveform(1, waveform)
+    assert dg.upload_volatile_waveform(2, waveform)
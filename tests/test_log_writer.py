@@ -0,0 +1,85 @@
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from log_writer import CsvLogWriter, DeadbandFilter
+
+def make_row(i, voltage=4.0):
+    return {'timestamp': f'18-10-2026 10:00:{i % 60:02d}', 'voltage': voltage, 'current': 0.1,
+            'power': voltage * 0.1, 'resistance': voltage / 0.1, 'capacity': i * 0.01,
+            'watthours': 0.0, 'discharging_time': f'0:0:{i}'}
+
+def read_rows(filename):
+    with open(filename, newline='') as f:
+        return list(csv.DictReader(f))
+
+def test_recover_partial_last_line(tmp_path):
+    filename = str(tmp_path / 'log.csv')
+    with CsvLogWriter(filename) as writer:
+        writer.write(make_row(0))
+        writer.write(make_row(1))
+    with open(filename, 'a') as f:
+        f.write('18-10-2026 10:00:02,3.9')  # сбой посреди строки
+    with CsvLogWriter(filename) as writer:
+        writer.write(make_row(3))
+    rows = read_rows(filename)
+    assert [row['capacity'] for row in rows] == ['0.0', '0.01', '0.03']
+
+def test_recover_partial_header(tmp_path):
+    filename = str(tmp_path / 'log.csv')
+    with open(filename, 'w') as f:
+        f.write('timestamp,volt')
+    with CsvLogWriter(filename) as writer:
+        writer.write(make_row(0))
+    with open(filename) as f:
+        assert f.readline().startswith('timestamp,voltage,')
+    assert len(read_rows(filename)) == 1
+
+def test_rotation_by_size(tmp_path):
+    filename = str(tmp_path / 'log.csv')
+    with CsvLogWriter(filename, flush_rows=1, rotate_bytes=400) as writer:
+        for i in range(20):
+            writer.write(make_row(i))
+    assert len(writer.files) > 1
+    assert writer.files[1] == str(tmp_path / 'log_part001.csv')
+    rows = [row for name in writer.files for row in read_rows(name)]
+    assert len(rows) == 20
+
+def test_rotation_by_time(tmp_path):
+    now = [0.0]
+    filename = str(tmp_path / 'log.csv')
+    with CsvLogWriter(filename, rotate_interval=10, clock=lambda: now[0]) as writer:
+        for i in range(5):
+            writer.write(make_row(i))
+            now[0] += 4
+    assert len(writer.files) == 2
+
+class ListWriter:
+    def __init__(self):
+        self.rows = []
+        self.closed = False
+
+    def write(self, data):
+        self.rows.append(data)
+
+    def close(self):
+        self.closed = True
+
+def test_deadband_keeps_first_and_last_row():
+    target = ListWriter()
+    writer = DeadbandFilter(target, {'voltage': 0.01})
+    for i in range(10):
+        writer.write(make_row(i, voltage=4.0 + i * 1e-4))
+    writer.close()
+    assert [row['discharging_time'] for row in target.rows] == ['0:0:0', '0:0:9']
+    assert target.closed
+    assert writer.rows_in == 10 and writer.rows_out == 2
+
+def test_deadband_writes_changes():
+    target = ListWriter()
+    writer = DeadbandFilter(target, {'voltage': 0.01})
+    for i, voltage in enumerate([4.0, 4.005, 3.98, 3.975, 3.96]):
+        writer.write(make_row(i, voltage))
+    writer.close()
+    assert [row['voltage'] for row in target.rows] == [4.0, 3.98, 3.96]
@@ -0,0 +1,31 @@
+import os
+import sys
+from collections import namedtuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from online_stats import DischargeStats, MAX_TIME_TO_VSTOP
+
+Sample = namedtuple("Sample", "timestamp voltage current resistance capacity")
+
+def make_sample(t, voltage):
+    return Sample(t, voltage, 0.1, voltage / 0.1, t * 0.1 / 3.6)
+
+def test_plateau_after_small_drop():
+    stats = DischargeStats(vstop=3.0)
+    stats.update(make_sample(0.0, 3.7))
+    stats.update(make_sample(1.0, 3.7 - 1e-6))
+    # Напряжение не меняется около 50 минут: dV/dt затухает почти до нуля
+    for t in range(2, 3000):
+        stats.update(make_sample(float(t), 3.7 - 1e-6))
+    assert stats.time_to_vstop is None
+    assert stats.capacity_at_vstop is None
+    assert "—" in stats.lines()[-1]
+    assert stats.summary()
+
+def test_falling_voltage():
+    stats = DischargeStats(vstop=3.0)
+    for t in range(100):
+        stats.update(make_sample(float(t), 3.7 - t * 1e-3))
+    remaining = stats.time_to_vstop
+    assert remaining is not None and 0 < remaining <= MAX_TIME_TO_VSTOP
+    assert abs(remaining - 601) < 1